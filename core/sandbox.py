@@ -9,7 +9,9 @@ import multiprocessing
 import traceback
 from contextlib import redirect_stderr, redirect_stdout
 from dataclasses import asdict
+from functools import lru_cache
 from multiprocessing.connection import Connection
+from types import CodeType
 from typing import Any, Dict
 
 import os
@@ -120,6 +122,15 @@ def _check_ast(tree: ast.AST) -> None:
     _Visitor().visit(tree)
 
 
+@lru_cache(maxsize=64)
+def _compile_checked(py_code: str) -> CodeType:
+    """Разобрать, проверить и скомпилировать код (кешируется по тексту)."""
+
+    tree = ast.parse(py_code, mode="exec")
+    _check_ast(tree)
+    return compile(tree, "<sandbox>", "exec")
+
+
 def _safe_builtins() -> Dict[str, Any]:
     return {
         "abs": abs,
@@ -186,9 +197,7 @@ def _coerce_result(result: Any) -> TaskResult:
 
 
 def _execute(py_code: str, params: Dict[str, Any], output_limit: int) -> TaskResult:
-    tree = ast.parse(py_code, mode="exec")
-    _check_ast(tree)
-    compiled = compile(tree, "<sandbox>", "exec")
+    compiled = _compile_checked(py_code)
     namespace = _prepare_globals()
     exec(compiled, namespace, None)
     run_callable = namespace.get("run")
@@ -230,8 +239,7 @@ def run_py(py_code: str, params: Dict[str, Any], *, timeout_s: int = 20, output_
     """Выполнить пользовательский код в отдельном процессе."""
 
     try:
-        tree = ast.parse(py_code, mode="exec")
-        _check_ast(tree)
+        _compile_checked(py_code)
     except (SyntaxError, SandboxViolation) as exc:
         return TaskResult.error(f"Код не прошёл проверку: {exc}")
 
@@ -2,14 +2,17 @@
 
 from __future__ import annotations
 
+import inspect
 import logging
 import re
 import time
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 from config import load_config
 from core.task_executor import compile_and_run
@@ -19,13 +22,47 @@ from tools.apps import get_aliases, IndexedEntry
 
 try:  # pragma: no cover - rapidfuzz может отсутствовать
     from rapidfuzz import fuzz  # type: ignore
+    from rapidfuzz import process as fuzz_process  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover
-    from difflib import SequenceMatcher
+    fuzz_process = None  # type: ignore
+
+    def _substring_distance(pattern: str, text: str) -> int:
+        """Минимальное расстояние Левенштейна от pattern до подстроки text (Myers/Hyyrö)."""
+
+        size = len(pattern)
+        peq: Dict[str, int] = {}
+        for idx, char in enumerate(pattern):
+            peq[char] = peq.get(char, 0) | (1 << idx)
+        full = (1 << size) - 1
+        high = 1 << (size - 1)
+        vp, vn = full, 0
+        score = best = size
+        for char in text:
+            eq = peq.get(char, 0)
+            xv = eq | vn
+            xh = ((((eq & vp) + vp) & full) ^ vp) | eq
+            hp = vn | (~(xh | vp) & full)
+            hn = vp & xh
+            if hp & high:
+                score += 1
+            elif hn & high:
+                score -= 1
+            # без переноса единицы в младший бит совпадение может начаться в любой позиции text
+            hp = (hp << 1) & full
+            hn = (hn << 1) & full
+            vp = hn | (~(xv | hp) & full)
+            vn = hp & xv
+            if score < best:
+                best = score
+        return best
 
     class _FallbackFuzz:
         @staticmethod
         def partial_ratio(a: str, b: str) -> float:
-            return SequenceMatcher(None, a, b).ratio() * 100
+            short, long = (a, b) if len(a) <= len(b) else (b, a)
+            if not short:
+                return 0.0
+            return 100.0 * (1 - _substring_distance(short, long) / len(short))
 
     fuzz = _FallbackFuzz()  # type: ignore
 from tools.files import FileManager, get_desktop_path, FILE_TYPE_EXT, FILE_KIND_EXT
@@ -42,6 +79,12 @@ FILE_KIND_ALIASES = {
     for alias, ext in FILE_TYPE_EXT.items()
     if ext in KIND_BY_EXTENSION
 }
+# расширение (".docx"), вид ("docx") или алиас ("ворд") -> вид файла
+KIND_LOOKUP = {
+    **KIND_BY_EXTENSION,
+    **{kind: kind for kind in FILE_KIND_EXT},
+    **FILE_KIND_ALIASES,
+}
 FILE_REFERENCE_TOKENS = {
     "файл", "файла", "файлу", "файлом", "файле",
     "документ", "документа", "документу", "документом", "документе",
@@ -51,6 +94,47 @@ FILE_REFERENCE_TOKENS = {
 }
 DEFAULT_KIND = "txt"
 REWRITE_MARKERS = {"перепиш", "перезапиш", "замени"}
+QUOTE_PAIRS = {'"': '"', "'": "'", "«": "»"}
+# ссылка на ранее найденный результат: номер, порядковое слово или местоимение
+CONTEXT_TOKEN_RE = re.compile(
+    r"(?P<digit>\d+)$|(?P<last>последн)|(?P<first>перв)|(?P<second>втор)|(?P<third>трет)|(?P<pronoun>(?:его|ее|её|их)$)"
+)
+# через сколько секунд неиспользуемые результаты считаются устаревшими (по time.monotonic)
+CONTEXT_STALE_SECONDS = 900
+
+# интенты, которые выполняются напрямую через FileManager
+FILE_OPERATION_INTENTS = frozenset({
+    "create_file",
+    "write_file",
+    "append_file",
+    "edit_file",
+    "move_path",
+    "copy_path",
+    "delete_path",
+    "list_directory",
+})
+MOVE_COPY_INTENTS = frozenset({"move_path", "copy_path"})
+# интенты, записывающие содержимое (в ответ добавляется размер файла)
+CONTENT_INTENTS = frozenset({"create_file", "write_file", "append_file", "edit_file"})
+# интенты, у которых параметр path нормализуется относительно белого списка
+PATH_INTENTS = FILE_OPERATION_INTENTS | {"open_file"}
+# интенты, которым в песочницу передаётся белый список
+WHITELIST_INTENTS = CONTENT_INTENTS | {"open_file", "list_directory", "search_local"}
+
+FILE_ACTION_TITLES = {
+    "create_file": "Создан файл",
+    "write_file": "Записан файл",
+    "append_file": "Дополнен файл",
+    "edit_file": "Файл обновлён",
+    "copy_path": "Скопировано",
+    "move_path": "Перемещено",
+    "delete_path": "Удалено",
+}
+APP_SOURCE_LABELS = {
+    "common": "общая папка",
+    "user": "личная папка",
+    "manual": "ручной список",
+}
 
 CREATE_FILE_CODE = """
 from tools.files import FileManager
@@ -58,7 +142,7 @@ from tools.files import FileManager
 def run(params):
     manager = FileManager(params["whitelist"])
     info = manager.create_file(params["path"], content=params.get("content", ""), confirmed=params.get("confirmed", False))
-    stdout = f"Создан файл: {info[\"path\"]} (exists={info.get(\"exists\")}, size={info.get(\"size\")})"
+    stdout = f"Создан файл: {info['path']} (exists={info.get('exists')}, size={info.get('size')})"
     return {"ok": bool(info.get("ok")), "stdout": stdout, "stderr": "", "data": {"file": info}}
 """
 
@@ -69,7 +153,7 @@ from tools.files import FileManager
 def run(params):
     manager = FileManager(params["whitelist"])
     info = manager.write_text(params["path"], content=params.get("content", ""), confirmed=params.get("confirmed", False))
-    stdout = f"Запись выполнена: {info[\"path\"]} (exists={info.get(\"exists\")}, size={info.get(\"size\")})"
+    stdout = f"Запись выполнена: {info['path']} (exists={info.get('exists')}, size={info.get('size')})"
     return {"ok": bool(info.get("ok")), "stdout": stdout, "stderr": "", "data": {"file": info}}
 """
 
@@ -80,7 +164,7 @@ from tools.files import FileManager
 def run(params):
     manager = FileManager(params["whitelist"])
     info = manager.append_text(params["path"], content=params.get("content", ""), confirmed=params.get("confirmed", False))
-    stdout = f"Добавление выполнено: {info[\"path\"]} (exists={info.get(\"exists\")}, size={info.get(\"size\")})"
+    stdout = f"Добавление выполнено: {info['path']} (exists={info.get('exists')}, size={info.get('size')})"
     return {"ok": bool(info.get("ok")), "stdout": stdout, "stderr": "", "data": {"file": info}}
 """
 
@@ -103,8 +187,8 @@ def run(params):
     manager = FileManager(params["whitelist"])
     info = manager.list_directory(params.get("path"), confirmed=params.get("confirmed", False))
     items = info.get("items", [])
-    listing = "\n".join(items) if items else "(пусто)"
-    stdout = f"Каталог: {info.get(\"path\")}\\n{listing}"
+    listing = "\\n".join(items) if items else "(пусто)"
+    stdout = f"Каталог: {info.get('path')}\\n{listing}"
     return {"ok": bool(info.get("ok")), "stdout": stdout, "stderr": "", "data": info}
 """
 
@@ -134,8 +218,7 @@ def run(params):
             "stderr": opened.get("error", ""),
             "data": data,
         }
-    lines = [f"{idx + 1}) {path}" for idx, path in enumerate(results)]
-    stdout = "Нашёл:\\n" + "\\n".join(lines)
+    stdout = "Нашёл:\\n" + "\\n".join(f"{idx}) {path}" for idx, path in enumerate(results, start=1))
     return {"ok": True, "stdout": stdout, "stderr": "", "data": data}
 """
 
@@ -165,8 +248,9 @@ def run(params):
         title = opened.get("title", first.get("title") or first.get("url"))
         stdout = f"Открыт сайт: {title}"
         return {"ok": bool(opened.get("ok", False)), "stdout": stdout, "stderr": opened.get("warning", ""), "data": data}
-    lines = [f"{idx + 1}) {item['title']} — {item['url']}" for idx, item in enumerate(results)]
-    stdout = "Нашёл сайты:\\n" + "\\n".join(lines)
+    stdout = "Нашёл сайты:\\n" + "\\n".join(
+        f"{idx}) {item['title']} — {item['url']}" for idx, item in enumerate(results, start=1)
+    )
     return {"ok": True, "stdout": stdout, "stderr": "", "data": data}
 """
 
@@ -195,6 +279,29 @@ CODE_BY_INTENT = {
 }
 
 
+@lru_cache(maxsize=16)
+def _alternation_re(words: tuple[str, ...], lookahead: bool = False) -> re.Pattern[str]:
+    """Регулярка «любое из слов», длинные варианты первыми; одна на все экземпляры с теми же словами."""
+
+    body = "|".join(map(re.escape, sorted(words, key=len, reverse=True)))
+    if lookahead:
+        return re.compile(r"(?=\b(" + body + r")\b)")
+    return re.compile(r"\b(?:" + body + r")\b")
+
+
+@lru_cache(maxsize=8)
+def _search_signature(search_callable: Callable[..., Any]) -> tuple[bool, bool]:
+    """Возвращает (принимает whitelist, принимает max_results) для функции поиска."""
+
+    try:
+        parameters = inspect.signature(search_callable).parameters
+    except (TypeError, ValueError):  # pragma: no cover - встроенные функции без сигнатуры
+        return False, False
+    if any(param.kind is inspect.Parameter.VAR_KEYWORD for param in parameters.values()):
+        return True, True
+    return "whitelist" in parameters, "max_results" in parameters
+
+
 @dataclass(slots=True)
 class PendingAction:
     description: str
@@ -207,7 +314,7 @@ class AgentSession:
     auto_confirm: bool = False
     model: str = "llama3.1:8b"
     pending: Optional[PendingAction] = None
-    session_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex)
     preferred_browser: Optional[str] = None
     awaiting_browser_choice: bool = False
     available_browsers: tuple[str, ...] = field(default_factory=tuple)
@@ -222,12 +329,12 @@ class SessionState:
     last_summary: str = ""
     last_summary_sources: List[str] = field(default_factory=list)
 
-    def set_results(self, results: List[str], kind: str) -> None:
-        filtered = [item for item in results if item]
+    def set_results(self, results: List[str], kind: str, *, prefiltered: bool = False) -> None:
+        filtered = results if prefiltered else [item for item in results if item]
         if filtered:
             self.last_results = filtered
             self.last_kind = kind
-            self.last_updated = time.time()
+            self.last_updated = time.monotonic()
         else:
             self.clear_results()
 
@@ -255,7 +362,31 @@ class IntentInferencer:
     OPEN_GENERIC_RE = re.compile(r"(?:открой|покажи|запусти)\s+(?P<target>.+)", re.IGNORECASE)
     OPEN_BROWSER_RE = re.compile(r"(?:открой|запусти|запустить|открыть)\s+(?:.*\s)?браузер", re.IGNORECASE)
     URL_RE = re.compile(r"(https?://\S+|www\.\S+)", re.IGNORECASE)
+    TOKEN_RE = re.compile(r'"[^"]*"|«[^»]+»|\'[^\']*\'|\S+')
     CONTENT_RE = re.compile(r"(?:с\s+текстом|контент|текст(?:ом)?)\s+(?P<value>.+)", re.IGNORECASE)
+    # сначала значения в кавычках, затем всё до конца строки
+    CONTENT_PATTERNS = tuple(
+        re.compile(pattern, re.IGNORECASE)
+        for pattern in (
+            r'с\s+текстом\s+(?P<value>"[^"]*"|«.+?»|\'[^\']*\')',
+            r'со\s+содержимым\s+(?P<value>"[^"]*"|«.+?»|\'[^\']*\')',
+            r'с\s+содержанием\s+(?P<value>"[^"]*"|«.+?»|\'[^\']*\')',
+            r'контент(?:ом)?\s+(?P<value>"[^"]*"|«.+?»|\'[^\']*\')',
+            r'текст(?:ом)?\s+(?P<value>"[^"]*"|«.+?»|\'[^\']*\')',
+            r"с\s+текстом\s+(?P<value>.+)",
+            r"контент(?:ом)?\s+(?P<value>.+)",
+            r"текст(?:ом)?\s+(?P<value>.+)",
+        )
+    )
+    COLON_SPLIT_RE = re.compile(r":\s+")
+    CREATE_VERB_RE = re.compile(r"созда[йте]", re.IGNORECASE)
+    EDIT_VERB_RE = re.compile(r"(отредактируй|дополни|добавь)", re.IGNORECASE)
+    CELL_REF_RE = re.compile(r"ячейк[аеуы]\s+(?P<cell>[A-Za-z]+\d+)", re.IGNORECASE)
+    PLEASE_RE = re.compile(r"\bпожалуйста\b", re.IGNORECASE)
+    PROMPT_TAIL_RE = re.compile(r"\s+(?:и\s+)?(?:добавь|вставь|запиши|дополни)\b")
+    POLITE_SUFFIX_RE = re.compile(r"\s*(?:пожалуйста|спасибо)\.?$", re.IGNORECASE)
+    EXTENSION_HINT_RE = re.compile(r"\.[\w]{1,6}(?:\s|$)")
+    FIND_PAGE_RE = re.compile(r"найди\s+(?:сайт|страницу)")
     FILE_PATH_CORE = (
         r"\"[^\"]+\.(?:txt|docx)\"|"
         r"'[^']+\.(?:txt|docx)'|"
@@ -295,6 +426,27 @@ class IntentInferencer:
             re.IGNORECASE,
         ),
     )
+    REFRESH_APPS_PHRASES = frozenset(
+        {
+            "пересканируй приложения",
+            "пересканируй список приложений",
+            "обнови список приложений",
+            "обнови приложения",
+        }
+    )
+    # глагол в начале, «в интернете/в сети» в конце и кавычки убираются за один проход
+    CLEAN_QUERY_RE = re.compile(
+        r"^(?:найди|найти|поищи|поищем|ищи|покажи|показать|посмотри|посмотреть|нужен|нужна|нужны|хочу)\s+"
+        r"|\s+(?:в\s+интернете|в\s+сети)$"
+        r"|[\"'«»]",
+        re.IGNORECASE,
+    )
+    # слова, без которых соответствующие регулярки заведомо не совпадут
+    EDIT_TRIGGERS = ("отредактируй", "дополни", "добавь")
+    SEARCH_FILE_TRIGGERS = ("найд", "найти", "ищи")
+    OPEN_GENERIC_TRIGGERS = ("открой", "покажи", "запусти")
+    URL_TRIGGERS = ("http://", "https://", "www.")
+    LIST_APPS_TRIGGERS = ("приложени", "программы")
     LIST_APPS_PATTERNS = (
         re.compile(r"покажи\s+список\s+приложений", re.IGNORECASE),
         re.compile(r"какие\s+программы\s+доступны", re.IGNORECASE),
@@ -391,85 +543,131 @@ class IntentInferencer:
         "bing",
         "бинг",
     }
+    # один проход регулярки вместо отдельного поиска по каждому слову
+    FILE_HINT_RE = re.compile(
+        r"\b(?:" + "|".join(map(re.escape, sorted(FILE_HINTS, key=lambda word: (-len(word), word)))) + r")\b"
+    )
+    SEARCH_VERB_RE = re.compile("|".join(map(re.escape, sorted(SEARCH_VERBS, key=lambda word: (-len(word), word)))))
+    WEB_SEARCH_RE = re.compile(
+        r"\bв интернете\b|\bв сети\b|\bв гугле\b|\bнайди\s+(?:сайт|страницу)\b|\bпоиск в интернете\b"
+    )
 
-    def __init__(self, app_aliases: Dict[str, str]):
-        self.app_aliases = app_aliases
-
-    def infer(self, message: str) -> Optional[Dict[str, Any]]:
-        normalized = message.lower().strip()
-        message_core = message.strip().rstrip(" ?!.")
-        file_hint = any(re.search(rf"\b{re.escape(word)}\b", normalized) for word in self.FILE_HINTS)
-
-        if normalized in {
-            "пересканируй приложения",
-            "пересканируй список приложений",
-            "обнови список приложений",
-            "обнови приложения",
-        }:
-            return {"intent": "refresh_apps"}
+    # порядок алиасов сохраняет приоритет FILE_KIND_ALIASES при нескольких совпадениях
+    KIND_ALIAS_ORDER: tuple[tuple[str, str], ...] = tuple(
+        (alias, kind) for alias, kind in FILE_KIND_ALIASES.items() if kind
+    )
+    KIND_ALIAS_PRIORITY: Dict[str, int] = {alias: idx for idx, (alias, _) in enumerate(KIND_ALIAS_ORDER)}
+    KIND_ALIAS_RE = re.compile(
+        r"\b(" + "|".join(re.escape(alias) for alias, _ in KIND_ALIAS_ORDER) + r")\b",
+        re.IGNORECASE,
+    )
 
-        for pattern in self.LIST_APPS_PATTERNS:
-            if pattern.search(normalized):
-                return {"intent": "list_apps"}
+    INFER_CACHE_SIZE = 256
+    # имя нового файла без явного пути строится от текущего времени
+    UNCACHED_INTENTS = frozenset({"create_file"})
+    # маркер промаха: в кеше законно лежит None для сообщений без интента
+    _CACHE_MISS: Any = object()
 
-        create_data = self._parse_create_command(message)
-        if create_data:
-            return create_data
+    def __init__(self, app_aliases: Dict[str, str]):
+        self._infer_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.app_aliases = app_aliases
+        # проверки файловых интентов по порядку; регулярка запускается,
+        # только если в сообщении есть обязательное для неё слово
+        self._candidate_intent_checks: tuple[tuple[tuple[str, ...], Callable[[str, str], Optional[Dict[str, Any]]]], ...] = (
+            (("запиши",), self._check_write),
+            (("добавь", "допиши"), self._check_append),
+            (("каталог", "директорию", "папк"), self._check_list_directory),
+            (("открой",), self._check_open_file),
+            (("закр",), self._check_close_app),
+            (("браузер",), self._check_open_browser),
+        )
 
-        edit_data = self._parse_edit_command(message)
-        if edit_data:
-            return edit_data
+    @property
+    def app_aliases(self) -> Dict[str, str]:
+        return self._app_aliases
 
-        match = self.WRITE_RE.search(message_core)
-        if match:
-            path = match.group("path")
-            content = self._extract_content(message_core)
-            return {"intent": "write_file", "path": path, "content": content}
+    @app_aliases.setter
+    def app_aliases(self, aliases: Dict[str, str]) -> None:
+        # распознавание приложений зависит от алиасов, старые результаты больше не верны
+        self._app_aliases = aliases
+        self._infer_cache.clear()
+        # все алиасы в одной регулярке: в каждой позиции lookahead находит самый длинный
+        self._alias_priority = {alias: idx for idx, alias in enumerate(aliases)}
+        self._alias_re = _alternation_re(tuple(aliases), lookahead=True) if aliases else None
 
-        match = self.APPEND_RE.search(message_core)
-        if match:
-            path = match.group("path")
-            content = self._extract_content(message_core)
-            return {"intent": "append_file", "path": path, "content": content}
+    def infer(self, message: str) -> Optional[Dict[str, Any]]:
+        # один get вместо in + []: кеш могут очистить из соседнего потока
+        cached = self._infer_cache.get(message, self._CACHE_MISS)
+        if cached is not self._CACHE_MISS:
+            return dict(cached) if cached else None
+        stripped = message.strip()
+        result = self._infer(stripped, stripped.lower())
+        if result is None or result.get("intent") not in self.UNCACHED_INTENTS:
+            if len(self._infer_cache) >= self.INFER_CACHE_SIZE:
+                self._infer_cache.clear()
+            self._infer_cache[message] = result
+        # вызывающий код забирает "intent" через pop, поэтому наружу отдаём копию
+        return dict(result) if result else None
+
+    def _infer(self, message: str, normalized: str) -> Optional[Dict[str, Any]]:
+        """Распознать интент по обрезанному сообщению и его нижнему регистру."""
+
+        message_core = message.rstrip(" ?!.")
+        file_hint = bool(self.FILE_HINT_RE.search(normalized))
+
+        if normalized in self.REFRESH_APPS_PHRASES:
+            return {"intent": "refresh_apps"}
 
-        match = self.LIST_RE.search(message_core)
-        if match:
-            path = match.group("path")
-            return {"intent": "list_directory", "path": path.strip() if path else None}
+        if any(trigger in normalized for trigger in self.LIST_APPS_TRIGGERS):
+            for pattern in self.LIST_APPS_PATTERNS:
+                if pattern.search(normalized):
+                    return {"intent": "list_apps"}
 
-        match = self.OPEN_FILE_RE.search(message_core)
-        if match:
-            return {"intent": "open_file", "path": match.group("path")}
+        if "созда" in normalized:
+            create_data = self._parse_create_command(message)
+            if create_data:
+                return create_data
 
-        close_data = self._parse_close_app(message)
-        if close_data:
-            return close_data
+        if any(trigger in normalized for trigger in self.EDIT_TRIGGERS):
+            edit_data = self._parse_edit_command(message)
+            if edit_data:
+                return edit_data
 
-        if self.OPEN_BROWSER_RE.search(message_core):
-            return {"intent": "open_browser"}
+        for triggers, check in self._candidate_intent_checks:
+            if not any(trigger in normalized for trigger in triggers):
+                continue
+            data = check(message, message_core)
+            if data:
+                return data
 
         app = self._detect_app(normalized)
         if app:
             return {"intent": "open_app", "name": app}
 
-        search_match = self.SEARCH_FILE_RE.search(message_core)
+        search_match = None
+        if any(trigger in normalized for trigger in self.SEARCH_FILE_TRIGGERS):
+            search_match = self.SEARCH_FILE_RE.search(message_core)
         if search_match and (file_hint or self._looks_like_path(search_match.group("query"))):
             query = search_match.group("query").strip()
             return {"intent": "search_file", "query": query}
 
-        open_match = self.OPEN_GENERIC_RE.search(message_core)
+        open_match = None
+        if any(trigger in normalized for trigger in self.OPEN_GENERIC_TRIGGERS):
+            open_match = self.OPEN_GENERIC_RE.search(message_core)
         if open_match:
             target = open_match.group("target").strip()
             if self._looks_like_file_reference(target):
                 return {"intent": "open_file", "query": target}
 
-        url_match = self.URL_RE.search(message_core)
+        url_match = None
+        if any(trigger in normalized for trigger in self.URL_TRIGGERS):
+            url_match = self.URL_RE.search(message_core)
         if url_match:
             return {"intent": "open_web", "url": url_match.group(0)}
 
         if self._should_search_web(normalized):
             query = self._clean_query(message) or message.strip()
-            open_first = "найди" not in normalized or bool(re.search(r"найди\s+(?:сайт|страницу)", normalized))
+            open_first = "найди" not in normalized or bool(self.FIND_PAGE_RE.search(normalized))
             return {"intent": "search_web", "query": query, "open_first": open_first}
 
         should_local = self._should_search_local(normalized)
@@ -479,32 +677,61 @@ class IntentInferencer:
 
         return None
 
+    def _check_write(self, message: str, message_core: str) -> Optional[Dict[str, Any]]:
+        match = self.WRITE_RE.search(message_core)
+        if not match:
+            return None
+        content = self._extract_content(message_core)
+        return {"intent": "write_file", "path": match.group("path"), "content": content}
+
+    def _check_append(self, message: str, message_core: str) -> Optional[Dict[str, Any]]:
+        match = self.APPEND_RE.search(message_core)
+        if not match:
+            return None
+        content = self._extract_content(message_core)
+        return {"intent": "append_file", "path": match.group("path"), "content": content}
+
+    def _check_list_directory(self, message: str, message_core: str) -> Optional[Dict[str, Any]]:
+        match = self.LIST_RE.search(message_core)
+        if not match:
+            return None
+        path = match.group("path")
+        return {"intent": "list_directory", "path": path.strip() if path else None}
+
+    def _check_open_file(self, message: str, message_core: str) -> Optional[Dict[str, Any]]:
+        match = self.OPEN_FILE_RE.search(message_core)
+        if not match:
+            return None
+        return {"intent": "open_file", "path": match.group("path")}
+
+    def _check_close_app(self, message: str, message_core: str) -> Optional[Dict[str, Any]]:
+        return self._parse_close_app(message)
+
+    def _check_open_browser(self, message: str, message_core: str) -> Optional[Dict[str, Any]]:
+        if self.OPEN_BROWSER_RE.search(message_core):
+            return {"intent": "open_browser"}
+        return None
+
     def _detect_app(self, normalized: str) -> Optional[str]:
-        best_key: Optional[str] = None
-        best_len = 0
-        for alias, key in self.app_aliases.items():
-            pattern = rf"\b{re.escape(alias)}\b"
-            if re.search(pattern, normalized) and len(alias) > best_len:
-                best_key = key
-                best_len = len(alias)
-        return best_key
+        if self._alias_re is None:
+            return None
+        best: Optional[str] = None
+        for match in self._alias_re.finditer(normalized):
+            alias = match.group(1)
+            if (
+                best is None
+                or len(alias) > len(best)
+                or (len(alias) == len(best) and self._alias_priority[alias] < self._alias_priority[best])
+            ):
+                best = alias
+        return self.app_aliases[best] if best else None
 
     def _extract_content(self, message: str) -> str:
-        patterns = (
-            r'с\s+текстом\s+(?P<value>"[^"]*"|«.+?»|\'[^\']*\')',
-            r'со\s+содержимым\s+(?P<value>"[^"]*"|«.+?»|\'[^\']*\')',
-            r'с\s+содержанием\s+(?P<value>"[^"]*"|«.+?»|\'[^\']*\')',
-            r'контент(?:ом)?\s+(?P<value>"[^"]*"|«.+?»|\'[^\']*\')',
-            r'текст(?:ом)?\s+(?P<value>"[^"]*"|«.+?»|\'[^\']*\')',
-            r"с\s+текстом\s+(?P<value>.+)",
-            r"контент(?:ом)?\s+(?P<value>.+)",
-            r"текст(?:ом)?\s+(?P<value>.+)",
-        )
-        for pattern in patterns:
-            match = re.search(pattern, message, re.IGNORECASE)
+        for pattern in self.CONTENT_PATTERNS:
+            match = pattern.search(message)
             if match:
                 return self._strip_quotes(match.group("value").strip())
-        colon_split = re.split(r":\s+", message, maxsplit=1)
+        colon_split = self.COLON_SPLIT_RE.split(message, maxsplit=1)
         if len(colon_split) == 2:
             return self._strip_quotes(colon_split[1].strip())
         return ""
@@ -512,19 +739,17 @@ class IntentInferencer:
     @staticmethod
     def _strip_quotes(value: str) -> str:
         trimmed = value.strip()
-        if len(trimmed) >= 2 and trimmed[0] in {'"', "'", "«"}:
-            closing = {'"': '"', "'": "'", "«": "»"}.get(trimmed[0], trimmed[0])
-            if trimmed.endswith(closing):
-                return trimmed[1:-1]
-        if trimmed.endswith("»") and trimmed.startswith("«"):
+        if len(trimmed) < 2:
+            return trimmed
+        closing = QUOTE_PAIRS.get(trimmed[0])
+        if closing and trimmed[-1] == closing:
             return trimmed[1:-1]
         return trimmed
 
 
-
     def _parse_create_command(self, message: str) -> Optional[Dict[str, Any]]:
         normalized_message = message.strip()
-        if not re.search(r"созда[йте]", normalized_message, re.IGNORECASE):
+        if not self.CREATE_VERB_RE.search(normalized_message):
             return None
         content = self._extract_content(message)
         kind = self._detect_kind(normalized_message)
@@ -542,7 +767,7 @@ class IntentInferencer:
                 kind = KIND_BY_EXTENSION[ext]
         if not explicit_path:
             ext = FILE_KIND_EXT.get(kind or DEFAULT_KIND, FILE_KIND_EXT[DEFAULT_KIND])
-            desktop = get_desktop_path().resolve(strict=False)
+            desktop = get_desktop_path()
             generated = desktop / f"new_{int(time.time())}{ext}"
             explicit_path = str(generated)
         return {
@@ -553,7 +778,7 @@ class IntentInferencer:
         }
 
     def _parse_edit_command(self, message: str) -> Optional[Dict[str, Any]]:
-        if not re.search(r"(отредактируй|дополни|добавь)", message, re.IGNORECASE):
+        if not self.EDIT_VERB_RE.search(message):
             return None
         kind = self._detect_kind(message)
         path = self._extract_explicit_path(message, kind)
@@ -638,13 +863,15 @@ class IntentInferencer:
 
     def _detect_kind(self, message: str) -> Optional[str]:
         lowered = message.lower()
-        for keyword, mapped in FILE_KIND_ALIASES.items():
-            if mapped and re.search(rf"\b{re.escape(keyword)}\b", lowered):
-                return mapped
-        return None
+        best: Optional[int] = None
+        for match in self.KIND_ALIAS_RE.finditer(lowered):
+            priority = self.KIND_ALIAS_PRIORITY[match.group(1)]
+            if best is None or priority < best:
+                best = priority
+        return self.KIND_ALIAS_ORDER[best][1] if best is not None else None
 
     def _extract_cell_reference(self, message: str) -> Optional[str]:
-        match = re.search(r"ячейк[аеуы]\s+(?P<cell>[A-Za-z]+\d+)", message, re.IGNORECASE)
+        match = self.CELL_REF_RE.search(message)
         if match:
             return match.group("cell")
         return None
@@ -654,7 +881,7 @@ class IntentInferencer:
         if not match:
             return None
         target_raw = match.group("target")
-        cleaned = re.sub(r"\bпожалуйста\b", "", target_raw, flags=re.IGNORECASE)
+        cleaned = self.PLEASE_RE.sub("", target_raw)
         cleaned = cleaned.strip().strip(".;,!?:")
         cleaned = self._strip_quotes(cleaned)
         if not cleaned:
@@ -667,8 +894,8 @@ class IntentInferencer:
 
     def _clean_generated_prompt(self, prompt: str) -> str:
         cleaned = prompt.strip()
-        cleaned = re.split(r"\s+(?:и\s+)?(?:добавь|вставь|запиши|дополни)\b", cleaned, maxsplit=1)[0]
-        cleaned = re.sub(r"\s*(?:пожалуйста|спасибо)\.?$", "", cleaned, flags=re.IGNORECASE)
+        cleaned = self.PROMPT_TAIL_RE.split(cleaned, maxsplit=1)[0]
+        cleaned = self.POLITE_SUFFIX_RE.sub("", cleaned)
         return self._strip_quotes(cleaned.strip(" .\"'»«"))
 
     def _extract_explicit_path(self, message: str, kind: Optional[str] = None) -> Optional[str]:
@@ -705,10 +932,11 @@ class IntentInferencer:
                 return candidate
         return None
 
-    @staticmethod
-    def _tokenize(message: str) -> List[str]:
-        pattern = r'"[^"]*"|«[^»]+»|\'[^\']*\'|\S+'
-        return [match.group(0) for match in re.finditer(pattern, message)]
+    @classmethod
+    def _tokenize(cls, message: str) -> List[str]:
+        if '"' not in message and "'" not in message and "«" not in message:
+            return message.split()
+        return [match.group(0) for match in cls.TOKEN_RE.finditer(message)]
 
     def _clean_token(self, token: str) -> str:
         stripped = token.strip().strip(",.;:")
@@ -718,56 +946,47 @@ class IntentInferencer:
         cleaned = message.strip()
         if not cleaned:
             return ""
-        cleaned = re.sub(
-            r"^(?:найди|найти|поищи|поищем|ищи|покажи|показать|посмотри|посмотреть|нужен|нужна|нужны|хочу)\s+",
-            "",
-            cleaned,
-            flags=re.IGNORECASE,
-        )
-        cleaned = re.sub(r"\s+(?:в\s+интернете|в\s+сети)$", "", cleaned, flags=re.IGNORECASE)
-        cleaned = re.sub(r"[\"'«»]", "", cleaned)
-        return cleaned.strip(" .?!")
+        return self.CLEAN_QUERY_RE.sub("", cleaned).strip(" .?!")
 
     def _should_search_local(self, normalized: str) -> bool:
-        return any(verb in normalized for verb in self.SEARCH_VERBS)
+        return bool(self.SEARCH_VERB_RE.search(normalized))
 
     def _should_search_web(self, normalized: str) -> bool:
-        patterns = (
-            r"\bв интернете\b",
-            r"\bв сети\b",
-            r"\bв гугле\b",
-            r"\bнайди\s+(?:сайт|страницу)\b",
-            r"\bпоиск в интернете\b",
-        )
-        return any(re.search(pattern, normalized) for pattern in patterns)
+        return bool(self.WEB_SEARCH_RE.search(normalized))
 
     def _looks_like_path(self, text: str) -> bool:
         lowered = text.lower()
         if any(symbol in lowered for symbol in ("\\", "/", ":")):
             return True
-        return bool(re.search(r"\.[\w]{1,6}(?:\s|$)", lowered))
+        return bool(self.EXTENSION_HINT_RE.search(lowered))
 
     def _looks_like_file_reference(self, text: str) -> bool:
-        lowered = text.lower()
-        if lowered.isdigit() or lowered in {"его", "ее", "её", "их"}:
-            return True
-        if any(lowered.startswith(prefix) for prefix in ("перв", "втор", "трет", "послед")):
+        if CONTEXT_TOKEN_RE.match(text.lower()):
             return True
         return self._looks_like_path(text)
 
 
 class IntentRouter:
     CONTEXT_RESET = {"сбрось контекст", "очисти контекст", "сброс контекста"}
+    # группы названы так же, как в CONTEXT_TOKEN_RE, чтобы индекс брался прямо из lastgroup
     CONTEXT_RE = re.compile(
-        r"открой\s+(?P<value>его|ее|её|их|перв(?:ый|ую)?|втор(?:ой|ую)?|трет(?:ий|ью)?|последн(?:ий|ю)?|\d+)",
+        r"открой\s+(?:(?P<pronoun>его|ее|её|их)|(?P<first>перв(?:ый|ую)?)|(?P<second>втор(?:ой|ую)?)"
+        r"|(?P<third>трет(?:ий|ью)?)|(?P<last>последн(?:ий|ю)?)|(?P<digit>\d+))",
         re.IGNORECASE,
     )
-    WORD_TO_INDEX = {
-        "перв": 0,
-        "втор": 1,
-        "трет": 2,
+    CONTEXT_GROUP_INDEX = {
+        "first": 0,
+        "second": 1,
+        "third": 2,
+        "pronoun": 0,
+        "last": -1,
     }
 
+    SEARCH_DISPLAY_LIMIT = 10
+    FUZZY_MATCH_CUTOFF = 65
+    INSTALLED_TTL_SECONDS = 30
+    AVAILABLE_BROWSERS_TTL_SECONDS = 60
+
     FILE_ACTION_NAMES = {
         "create_file": "создание",
         "write_file": "запись",
@@ -783,13 +1002,60 @@ class IntentRouter:
         if not isinstance(whitelist, list):
             whitelist = []
         self.whitelist: List[str] = [str(item) for item in whitelist]
-        self.file_manager = FileManager(self.whitelist)
+        # неизменяемый снимок белого списка для передачи в поиск и песочницу без копирования
+        self._whitelist_snapshot: tuple[str, ...] = tuple(self.whitelist)
+        self.file_manager = FileManager(self._whitelist_snapshot)
         self.intent_inferencer = IntentInferencer(get_aliases())
         self.apps = apps_module
         self.APP_KEYWORDS: Dict[str, tuple[str, ...]] = self._build_app_keywords()
+        self._app_keyword_choices = self._flatten_keywords(self.APP_KEYWORDS)
         self.llm = OllamaClient()
+        # модель по умолчанию не меняется после запуска, читаем её один раз
+        self.default_model: str = self.llm.default_model
         self.browser_ids: tuple[str, ...] = ("chrome", "edge", "firefox")
+        # интенты со своими обработчиками; остальные идут через _prepare_params
+        self._intent_handlers: Dict[str, Callable[[Dict[str, Any], AgentSession, SessionState, bool], Dict[str, Any]]] = {
+            "qa/smalltalk": lambda params, session, state, confirmed: self._handle_smalltalk(params, session, state),
+            "list_apps": lambda params, session, state, confirmed: self._handle_list_apps(state),
+            "open_browser": lambda params, session, state, confirmed: self._handle_open_browser(session, params),
+            "close_app": lambda params, session, state, confirmed: self._handle_close_app(params, state),
+            "refresh_apps": lambda params, session, state, confirmed: self._handle_refresh_apps(),
+            "open_app": lambda params, session, state, confirmed: self._handle_open_app(params, state),
+            "search_file": lambda params, session, state, confirmed: self._handle_search_file(params, state),
+            "open_file": lambda params, session, state, confirmed: self._handle_open_file(params, state),
+            "generate_write_file": self._handle_generate_write_file,
+        }
+        # фиксированные фразы обрабатываются одним поиском по словарю
+        self._fast_commands: Dict[str, Callable[[AgentSession, SessionState, bool], Dict[str, Any]]] = {
+            **{phrase: self._command_reset_context for phrase in self.CONTEXT_RESET},
+            "напиши путь до рабочего стола": self._command_desktop_path,
+            "какой путь до рабочего стола": self._command_desktop_path,
+            "какие файлы есть на рабочем столе": self._command_desktop_listing,
+            "покажи рабочий стол": self._command_desktop_listing,
+        }
         self.browser_aliases: Dict[str, tuple[str, ...]] = self._build_browser_aliases()
+        # известные приложения меняются только при пересканировании, поэтому кешируем их
+        # до refresh_apps; список установленных браузеров дополнительно живёт не дольше
+        # AVAILABLE_BROWSERS_TTL_SECONDS
+        self._available_browsers_cache: Optional[List[str]] = None
+        self._available_browsers_checked_at = 0.0
+        self._known_apps_cache: Optional[Dict[str, Any]] = None
+        # проверка установки ходит в файловую систему; ответ живёт INSTALLED_TTL_SECONDS
+        self._installed_cache: Dict[str, tuple[float, bool]] = {}
+        self._browser_by_alias: Dict[str, str] = {
+            alias.lower(): browser_id
+            for browser_id, aliases in self.browser_aliases.items()
+            for alias in aliases
+        }
+        # длинные алиасы первыми, чтобы «google chrome» не обрезался до «google»
+        self._browser_alias_re = _alternation_re(tuple(self._browser_by_alias))
+
+    def warm_up(self) -> None:
+        """Заполнить кеши приложений и разбора интентов до первого сообщения клиента."""
+
+        self._known_apps_cache = apps_module.get_known_apps()
+        self._available_browsers()
+        self.intent_inferencer.infer("открой блокнот")
 
     def ask_llm(self, prompt: str, model: Optional[str] = None) -> str:
         chosen_model = model or getattr(self.llm, "default_model", None)
@@ -822,12 +1088,12 @@ class IntentRouter:
 
             session_state = self._ensure_session_state(state)
 
-            if session_state.last_results and time.time() - session_state.last_updated > 900:
+            if session_state.last_results and time.monotonic() - session_state.last_updated > CONTEXT_STALE_SECONDS:
                 session_state.clear_results()
 
             confirmed_flag = bool(force_confirm) or bool(auto_confirm) or bool(getattr(session, "auto_confirm", False))
 
-            normalized = message.lower().strip()
+            normalized = message.lower()
             normalized_clean = normalized.rstrip(" ?!.")
 
             save_response = self._handle_save_summary_request(message, normalized, session_state, confirmed_flag)
@@ -841,6 +1107,10 @@ class IntentRouter:
                 options = self._browser_display_list(session.available_browsers or self.browser_ids)
                 return self._make_response(f"Какой браузер открыть? Доступны: {options}", ok=False)
 
+            fast_command = self._fast_commands.get(normalized_clean)
+            if fast_command:
+                return fast_command(session, session_state, confirmed_flag)
+
             context_response = self._handle_context_commands(
                 message,
                 normalized_clean,
@@ -851,17 +1121,7 @@ class IntentRouter:
             if context_response:
                 return context_response
 
-            if normalized_clean in {"напиши путь до рабочего стола", "какой путь до рабочего стола"}:
-                desktop = get_desktop_path().resolve(strict=False)
-                return self._make_response(f"Рабочий стол: {desktop}", ok=True)
-
-            if normalized_clean in {"какие файлы есть на рабочем столе", "покажи рабочий стол"}:
-                intent_data: Optional[Dict[str, Any]] = {
-                    "intent": "list_directory",
-                    "path": str(get_desktop_path()),
-                }
-            else:
-                intent_data = self.intent_inferencer.infer(message)
+            intent_data = self.intent_inferencer.infer(message)
 
             if not intent_data:
                 if getattr(session, "streaming_enabled", False):
@@ -882,6 +1142,23 @@ class IntentRouter:
             logger.exception("Ошибка обработки сообщения: %s", exc)
             return self._make_response(f"Ошибка: {exc}", ok=False)
 
+    def _command_reset_context(
+        self, session: AgentSession, session_state: SessionState, confirmed: bool
+    ) -> Dict[str, Any]:
+        session_state.clear_results()
+        return self._make_response("Контекст очищен.", ok=True)
+
+    def _command_desktop_path(
+        self, session: AgentSession, session_state: SessionState, confirmed: bool
+    ) -> Dict[str, Any]:
+        return self._make_response(f"Рабочий стол: {get_desktop_path()}", ok=True)
+
+    def _command_desktop_listing(
+        self, session: AgentSession, session_state: SessionState, confirmed: bool
+    ) -> Dict[str, Any]:
+        params = {"path": str(get_desktop_path())}
+        return self._run_intent("list_directory", params, session, session_state, confirmed)
+
     def _handle_context_commands(
         self,
         message: str,
@@ -890,17 +1167,14 @@ class IntentRouter:
         session_state: SessionState,
         confirmed: bool,
     ) -> Optional[Dict[str, Any]]:
-        if normalized in self.CONTEXT_RESET:
-            session_state.clear_results()
-            return self._make_response("Контекст очищен.", ok=True)
-
+        if "открой" not in normalized:
+            return None
         match = self.CONTEXT_RE.search(normalized)
         if not match:
             return None
         if not session_state.last_results:
             return self._make_response("Нет сохранённых результатов для открытия.", ok=False)
-        token = match.group("value")
-        index = self._resolve_context_index(token, len(session_state.last_results))
+        index = self._resolve_context_index(match, len(session_state.last_results))
         if index is None:
             total = len(session_state.last_results)
             return self._make_response(f"Выберите число от 1 до {total} или используйте 'первый/последний'.", ok=False)
@@ -917,34 +1191,26 @@ class IntentRouter:
             return self._run_intent("open_app", params, session, session_state, confirmed)
         return self._make_response("Контекст недоступен для повторного открытия.", ok=False)
 
-    def _resolve_context_index(self, token: str, total: int) -> Optional[int]:
-        token = token.lower()
-        if token.isdigit():
-            index = int(token) - 1
-        elif token.startswith("последн"):
-            index = total - 1
-        elif token in {"его", "ее", "её", "их"}:
-            index = 0
+    def _resolve_context_index(self, token_match: re.Match[str], total: int) -> Optional[int]:
+        group = token_match.lastgroup
+        if group == "digit":
+            index = int(token_match.group("digit")) - 1
         else:
-            for prefix, value in self.WORD_TO_INDEX.items():
-                if token.startswith(prefix):
-                    index = value
-                    break
-            else:
-                return None
+            index = self.CONTEXT_GROUP_INDEX[group]
+            if index < 0:
+                index += total
         if index < 0 or index >= total:
             return None
         return index
 
     def _resolve_file_kind(self, path: str, kind: Optional[str]) -> str:
-        ext = Path(str(path)).suffix.lower()
-        if ext in KIND_BY_EXTENSION:
-            return KIND_BY_EXTENSION[ext]
+        _, dot, tail = str(path).rpartition(".")
+        if dot:
+            mapped = KIND_LOOKUP.get("." + tail.lower())
+            if mapped:
+                return mapped
         if isinstance(kind, str):
-            key = kind.lower()
-            if key in FILE_KIND_EXT:
-                return key
-            mapped = FILE_KIND_ALIASES.get(key)
+            mapped = KIND_LOOKUP.get(kind.lower())
             if mapped:
                 return mapped
         return DEFAULT_KIND
@@ -956,29 +1222,27 @@ class IntentRouter:
             session_state.clear_results()
             return self._make_response("Не указан запрос для поиска.", ok=False, items=[])
 
-        search_callable = getattr(search_tools, "search_files", None)
-        if not callable(search_callable):  # pragma: no cover - fallback для старых версий
-            search_callable = getattr(search_tools, "search_local")
+        search_callable = search_tools.search_files
+        supports_whitelist, supports_max = _search_signature(search_callable)
 
         max_results = params.get("max_results")
-        kwargs: Dict[str, Any] = {"whitelist": list(self.whitelist)}
-        if isinstance(max_results, int) and max_results > 0:
+        kwargs: Dict[str, Any] = {}
+        if supports_whitelist:
+            kwargs["whitelist"] = self._whitelist_snapshot
+        if supports_max and isinstance(max_results, int) and max_results > 0:
             kwargs["max_results"] = max_results
-        try:
-            results = search_callable(query, **kwargs)
-        except TypeError:  # pragma: no cover - совместимость сигнатур
-            results = search_callable(query)
+        results = search_callable(query, **kwargs)
 
-        normalized = [str(item) for item in results if item]
+        normalized = list(map(str, filter(None, results)))
         if not normalized:
             session_state.clear_results()
             return self._make_response("Ничего не найдено.", ok=False, items=[])
 
+        # set_results хранит свою копию, поэтому сам список можно отдать в ответ
         session_state.set_results(normalized, "file")
-        lines = [f"{idx + 1}) {entry}" for idx, entry in enumerate(normalized[:10])]
-        display = "\n".join(lines)
+        display = "\n".join(f"{idx}) {entry}" for idx, entry in enumerate(islice(normalized, self.SEARCH_DISPLAY_LIMIT), start=1))
         reply = f"Нашёл:\n{display}"
-        return self._make_response(reply, ok=True, items=list(normalized))
+        return self._make_response(reply, ok=True, items=normalized)
 
     def _handle_open_file(self, params: Dict[str, Any], session_state: SessionState) -> Dict[str, Any]:
         raw_path = params.get("path") or params.get("query")
@@ -989,19 +1253,14 @@ class IntentRouter:
         if not token:
             return self._make_response("Не указан путь для открытия.", ok=False)
 
-        lowered = token.lower()
-        use_context = False
-        if lowered.isdigit() or lowered in {"его", "ее", "её", "их"}:
-            use_context = True
-        elif any(lowered.startswith(prefix) for prefix in ("перв", "втор", "трет", "послед")):
-            use_context = True
+        token_match = CONTEXT_TOKEN_RE.match(token.lower())
 
         target_path = token
-        if use_context:
+        if token_match:
             candidates = session_state.get_results(kind="file")
             if not candidates:
                 return self._make_response("Нет сохранённых результатов для открытия.", ok=False)
-            index = self._resolve_context_index(token, len(candidates))
+            index = self._resolve_context_index(token_match, len(candidates))
             if index is None:
                 total = len(candidates)
                 return self._make_response(
@@ -1009,7 +1268,7 @@ class IntentRouter:
                     ok=False,
                 )
             target_path = candidates[index]
-            session_state.last_updated = time.time()
+            session_state.last_updated = time.monotonic()
 
         info = self.file_manager.open_path(str(target_path))
         opened_path = str(info.get("path") or target_path)
@@ -1032,6 +1291,7 @@ class IntentRouter:
 
     def _handle_refresh_apps(self) -> Dict[str, Any]:
         result = self.apps.refresh_index()
+        self._invalidate_app_caches()
         if result.get("ok"):
             count = int(result.get("count", 0))
             # обновляем алиасы в инференсере после пересканирования
@@ -1041,6 +1301,20 @@ class IntentRouter:
         error = result.get("error") or "Не удалось обновить список приложений"
         return self._make_response(error, ok=False, data={"result": result})
 
+    def _invalidate_app_caches(self) -> None:
+        self._available_browsers_cache = None
+        self._known_apps_cache = None
+        self._installed_cache.clear()
+
+    def _is_installed(self, app_id: str) -> bool:
+        now = time.monotonic()
+        cached = self._installed_cache.get(app_id)
+        if cached is not None and now - cached[0] <= self.INSTALLED_TTL_SECONDS:
+            return cached[1]
+        installed = bool(apps_module.is_installed(app_id))
+        self._installed_cache[app_id] = (now, installed)
+        return installed
+
     def _handle_list_apps(self, session_state: SessionState, limit: int = 20) -> Dict[str, Any]:
         names = self.apps.list_indexed(limit=limit)
         if not names:
@@ -1068,6 +1342,13 @@ class IntentRouter:
             result = self.apps.launch(query)
             return self._finalize_app_launch(result, session_state, from_context=True, fallback_name=query)
 
+        # точное совпадение с приложением из ручного списка запускаем сразу,
+        # не ранжируя остальные варианты
+        exact = self.apps.best_candidate(query)
+        if exact is not None and exact.is_manual:
+            result = self.apps.launch_entry(exact)
+            return self._finalize_app_launch(result, session_state, fallback_name=exact.name)
+
         ranked: List[IndexedEntry] = self.apps.candidates(query, limit=5)
         if ranked:
             best = ranked[0]
@@ -1085,9 +1366,9 @@ class IntentRouter:
                 return self._finalize_app_launch(result, session_state, fallback_name=best.name)
 
         if ranked:
-            names = [entry.name for entry in ranked[:5]]
+            names = [entry.name for entry in ranked]
             session_state.set_results(names, "app")
-            listing = self._format_app_options(ranked[:5])
+            listing = self._format_app_options(ranked)
             reply = "Нашёл несколько приложений:\n" + listing + "\nНазовите номер или точное название."
             return self._make_response(reply, ok=False, items=names)
 
@@ -1097,8 +1378,8 @@ class IntentRouter:
             raw_options = result.get("candidates") or []
             options = [str(name) for name in raw_options if name]
             if options:
-                session_state.set_results(options, "app")
-                listing = "\n".join(f"{idx + 1}) {name}" for idx, name in enumerate(options))
+                session_state.set_results(options, "app", prefiltered=True)
+                listing = "\n".join(f"{idx}) {name}" for idx, name in enumerate(options, start=1))
                 reply = "Нашёл несколько приложений:\n" + listing + "\nНазовите номер или точное название."
                 return self._make_response(reply, ok=False, items=options)
 
@@ -1118,7 +1399,7 @@ class IntentRouter:
             launched = result.get("launched") or fallback_name
             if launched:
                 if from_context:
-                    session_state.last_updated = time.time()
+                    session_state.last_updated = time.monotonic()
                 else:
                     session_state.set_results([str(launched)], "app")
         data = {"result": result}
@@ -1126,20 +1407,14 @@ class IntentRouter:
 
     @staticmethod
     def _format_app_options(options: List["IndexedEntry"]) -> str:
-        label_map = {
-            "common": "общая папка",
-            "user": "личная папка",
-            "manual": "ручной список",
-        }
-        lines: List[str] = []
-        for idx, entry in enumerate(options, start=1):
+        def _line(idx: int, entry: "IndexedEntry") -> str:
             if entry.is_manual:
-                source = label_map["manual"]
+                source = APP_SOURCE_LABELS["manual"]
             else:
-                source = label_map.get(entry.source, entry.source)
-            suffix = f" — {source}" if source else ""
-            lines.append(f"{idx}) {entry.name}{suffix}")
-        return "\n".join(lines)
+                source = APP_SOURCE_LABELS.get(entry.source, entry.source)
+            return f"{idx}) {entry.name} — {source}" if source else f"{idx}) {entry.name}"
+
+        return "\n".join(_line(idx, entry) for idx, entry in enumerate(options, start=1))
 
     def _handle_generate_write_file(
         self,
@@ -1247,58 +1522,15 @@ class IntentRouter:
         session_state: SessionState,
         confirmed: bool,
     ) -> Dict[str, Any]:
-        if intent == "qa/smalltalk":
-            prompt = str(params.get("prompt") or params.get("text") or params.get("message") or "")
-            if not prompt and session_state.last_results:
-                prompt = session_state.last_results[0]
-            if getattr(session, "streaming_enabled", False):
-                return self._make_response(
-                    "Генерирую ответ…",
-                    ok=True,
-                    data={"prompt": prompt},
-                    intent="qa",
-                )
-            answer = self.ask_llm(prompt or "", model=getattr(session, "model", None))
-            return self._make_response(answer, ok=True, intent="qa")
-
-        if intent == "list_apps":
-            return self._handle_list_apps(session_state)
-
-        if intent == "open_browser":
-            return self._handle_open_browser(session, params)
-
-        if intent == "close_app":
-            return self._handle_close_app(params, session_state)
-
-        if intent == "refresh_apps":
-            return self._handle_refresh_apps()
-
-        if intent == "open_app":
-            return self._handle_open_app(params, session_state)
-
-        if intent == "search_file":
-            return self._handle_search_file(params, session_state)
-
-        if intent == "open_file":
-            return self._handle_open_file(params, session_state)
-
-        if intent == "generate_write_file":
-            return self._handle_generate_write_file(params, session, session_state, confirmed)
+        handler = self._intent_handlers.get(intent)
+        if handler is not None:
+            return handler(params, session, session_state, confirmed)
 
         prepared, confirmation_response = self._prepare_params(intent, params, session, confirmed)
         if confirmation_response is not None:
             return confirmation_response
 
-        if intent in {
-            "create_file",
-            "write_file",
-            "append_file",
-            "edit_file",
-            "move_path",
-            "copy_path",
-            "delete_path",
-            "list_directory",
-        }:
+        if intent in FILE_OPERATION_INTENTS:
             return self._handle_file_operation(intent, prepared, session_state)
 
         code = CODE_BY_INTENT.get(intent)
@@ -1308,6 +1540,20 @@ class IntentRouter:
         result = compile_and_run(code, request.params)
         return self._format_response(request, result, session_state, session)
 
+    def _handle_smalltalk(self, params: Dict[str, Any], session: AgentSession, session_state: SessionState) -> Dict[str, Any]:
+        prompt = str(params.get("prompt") or params.get("text") or params.get("message") or "")
+        if not prompt and session_state.last_results:
+            prompt = session_state.last_results[0]
+        if getattr(session, "streaming_enabled", False):
+            return self._make_response(
+                "Генерирую ответ…",
+                ok=True,
+                data={"prompt": prompt},
+                intent="qa",
+            )
+        answer = self.ask_llm(prompt or "", model=getattr(session, "model", None))
+        return self._make_response(answer, ok=True, intent="qa")
+
     def _prepare_params(
         self,
         intent: str,
@@ -1316,7 +1562,7 @@ class IntentRouter:
         confirmed: bool,
     ) -> tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
         prepared = dict(params)
-        if intent in {"create_file", "write_file", "append_file", "edit_file", "open_file", "list_directory", "move_path", "copy_path", "delete_path"}:
+        if intent in PATH_INTENTS:
             path_value = prepared.get("path")
             if isinstance(path_value, str) and path_value.endswith(":") and len(path_value) > 2:
                 path_value = path_value.rstrip(":")
@@ -1328,24 +1574,17 @@ class IntentRouter:
             if target is not None:
                 prepared["path"] = str(target)
                 prepared["confirmed"] = confirmed
-                if intent in {"move_path", "copy_path"}:
+                if intent in MOVE_COPY_INTENTS:
                     prepared.setdefault("src", str(target))
-        if intent == "move_path":
-            destination = prepared.get("destination") or prepared.get("dst") or prepared.get("to")
-            if isinstance(destination, str) and destination.endswith(":") and len(destination) > 2:
-                destination = destination.rstrip(":")
-                prepared["destination"] = destination
-            if destination:
-                prepared["dst"] = str(self.file_manager.normalize(destination))
-        if intent == "copy_path":
+        if intent in MOVE_COPY_INTENTS:
             destination = prepared.get("destination") or prepared.get("dst") or prepared.get("to")
             if isinstance(destination, str) and destination.endswith(":") and len(destination) > 2:
                 destination = destination.rstrip(":")
                 prepared["destination"] = destination
             if destination:
                 prepared["dst"] = str(self.file_manager.normalize(destination))
-        if intent in {"create_file", "write_file", "append_file", "edit_file", "open_file", "list_directory", "search_local"}:
-            prepared["whitelist"] = list(self.whitelist)
+        if intent in WHITELIST_INTENTS:
+            prepared["whitelist"] = self._whitelist_snapshot
         if intent == "search_local":
             prepared.setdefault("max_results", 10)
         if intent == "search_web":
@@ -1413,8 +1652,9 @@ class IntentRouter:
                     )
                 else:
                     target_path = str(path_value)
-                    if not Path(target_path).suffix:
-                        target_path = str(Path(target_path).with_suffix(FILE_KIND_EXT[DEFAULT_KIND]))
+                    head, dot, tail = target_path.rpartition(".")
+                    if not (dot and tail and head) or "/" in tail or "\\" in tail or head[-1] in "/\\":
+                        target_path += FILE_KIND_EXT[DEFAULT_KIND]
                     if params.get("mode") == "write":
                         info = self.file_manager.write_text(
                             target_path,
@@ -1452,43 +1692,32 @@ class IntentRouter:
             logger.exception("Ошибка подготовки операции %s: %s", intent, exc)
             return self._make_response(f"Ошибка: {exc}", ok=False)
 
+        path_display = info.get("path") or str(path_value or params.get("dst") or "")
         if info.get("requires_confirmation"):
-            target_path = info.get("path") or str(path_value or params.get("dst") or "")
-            reply = f"Нужно подтверждение для операции по пути: {target_path} — ответьте «да»"
+            reply = f"Нужно подтверждение для операции по пути: {path_display} — ответьте «да»"
             return self._make_response(reply, ok=False, data={"result": info}, requires_confirmation=True)
 
         if not info.get("ok"):
             error_message = info.get("error") or "Не удалось выполнить файловую операцию"
-            target_path = info.get("path") or str(path_value or params.get("dst") or "")
-            reply = f"Ошибка: {error_message} ({target_path})"
+            reply = f"Ошибка: {error_message} ({path_display})"
             return self._make_response(reply, ok=False, data={"result": info})
 
-        path_display = info.get("path") or str(path_value or params.get("dst") or "")
         extras: List[str] = []
         if "exists" in info:
             extras.append(f"exists={info['exists']}")
-        if intent in {"create_file", "write_file", "append_file", "edit_file"} and "size" in info:
+        if intent in CONTENT_INTENTS and "size" in info:
             extras.append(f"size={info['size']}")
 
         if intent == "list_directory":
             raw_items = info.get("items") if isinstance(info.get("items"), list) else []
-            items = list(raw_items)
+            items = raw_items
             listing = "\n".join(items) if items else "(пусто)"
-            desktop_path = str(get_desktop_path().resolve(strict=False))
-            label = "Рабочий стол" if str(path_display) == desktop_path else "Каталог"
+            # get_desktop_path кеширует resolve() в tools.files, здесь остаётся только сравнение строк
+            label = "Рабочий стол" if path_display == str(get_desktop_path()) else "Каталог"
             reply = f"{label}: {path_display}\n{listing}"
             return self._make_response(reply, ok=True, data={"result": info}, items=items or None)
 
-        action_titles = {
-            "create_file": "Создан файл",
-            "write_file": "Записан файл",
-            "append_file": "Дополнен файл",
-            "edit_file": "Файл обновлён",
-            "copy_path": "Скопировано",
-            "move_path": "Перемещено",
-            "delete_path": "Удалено",
-        }
-        prefix = action_titles.get(intent, "Операция выполнена")
+        prefix = FILE_ACTION_TITLES.get(intent, "Операция выполнена")
         suffix = f" ({', '.join(extras)})" if extras else ""
         reply = f"{prefix}: {path_display}{suffix}"
         return self._make_response(reply, ok=True, data={"result": info})
@@ -1511,12 +1740,12 @@ class IntentRouter:
             if request.intent == "search_local":
                 results = data.get("results", [])
                 if isinstance(results, list):
-                    normalized = [str(item) for item in results]
+                    normalized = list(map(str, results))
                     session_state.set_results(normalized, "file")
-                    items = list(normalized)
+                    items = normalized
                     if normalized:
-                        lines = [f"{idx + 1}) {entry}" for idx, entry in enumerate(normalized)]
-                        reply_override = "Готово: Нашёл:\n" + "\n".join(lines)
+                        listing = "\n".join(f"{idx}) {entry}" for idx, entry in enumerate(normalized, start=1))
+                        reply_override = "Готово: Нашёл:\n" + listing
                     else:
                         reply_override = "Готово: Ничего не найдено"
             elif request.intent == "open_file":
@@ -1524,7 +1753,7 @@ class IntentRouter:
                 if path and not request.params.get("from_context"):
                     session_state.set_results([str(path)], "file")
                 elif request.params.get("from_context"):
-                    session_state.last_updated = time.time()
+                    session_state.last_updated = time.monotonic()
                 message = result.stdout.strip()
                 if message:
                     reply_override = message
@@ -1541,7 +1770,7 @@ class IntentRouter:
                                 urls.append(str(url))
                             display.append(f"{title} — {url}" if title and url else title or url or "")
                     if urls:
-                        session_state.set_results(urls, "web")
+                        session_state.set_results(urls, "web", prefiltered=True)
                         items = [item for item in display if item]
                         summary_info = self._summarize_web_results(
                             str(request.params.get("query") or ""),
@@ -1560,13 +1789,13 @@ class IntentRouter:
                 if url and not request.params.get("from_context"):
                     session_state.set_results([str(url)], "web")
                 elif request.params.get("from_context"):
-                    session_state.last_updated = time.time()
+                    session_state.last_updated = time.monotonic()
             elif request.intent == "open_app":
                 name = request.params.get("name")
                 if name and not request.params.get("from_context"):
                     session_state.set_results([str(name)], "app")
                 elif request.params.get("from_context"):
-                    session_state.last_updated = time.time()
+                    session_state.last_updated = time.monotonic()
             elif request.intent == "list_directory":
                 items = data.get("items") if isinstance(data.get("items"), list) else None
         else:
@@ -1738,20 +1967,10 @@ class IntentRouter:
     @staticmethod
     def _strip_quotes(value: str) -> str:
         trimmed = value.strip()
-        if not trimmed:
+        # одиночная прямая кавычка здесь всегда означала пустое имя, в отличие от разбора интентов
+        if QUOTE_PAIRS.get(trimmed) == trimmed:
             return ""
-        quote_pairs = {
-            '"': '"',
-            "'": "'",
-            "«": "»",
-        }
-        opener = trimmed[0]
-        closer = quote_pairs.get(opener)
-        if closer and trimmed.endswith(closer):
-            return trimmed[1:-1]
-        if trimmed.endswith("»") and trimmed.startswith("«"):
-            return trimmed[1:-1]
-        return trimmed
+        return IntentInferencer._strip_quotes(trimmed)
 
     def _build_browser_aliases(self) -> Dict[str, tuple[str, ...]]:
         return {
@@ -1769,15 +1988,21 @@ class IntentRouter:
         return {key: tuple(sorted(values)) for key, values in mapping.items()}
 
     def _available_browsers(self) -> List[str]:
-        available: List[str] = []
-        for browser_id in self.browser_ids:
-            if apps_module.is_installed(browser_id):
-                available.append(browser_id)
+        now = time.monotonic()
+        # читаем кеш один раз: _invalidate_app_caches может сбросить его из другого потока
+        available = self._available_browsers_cache
+        if available is None or now - self._available_browsers_checked_at > self.AVAILABLE_BROWSERS_TTL_SECONDS:
+            available = [browser_id for browser_id in self.browser_ids if self._is_installed(browser_id)]
+            self._available_browsers_cache = available
+            self._available_browsers_checked_at = now
         return available
 
     def _browser_title(self, browser_id: str) -> str:
-        apps = apps_module.get_known_apps()
-        app = apps.get(browser_id)
+        known_apps = self._known_apps_cache
+        if known_apps is None:
+            known_apps = apps_module.get_known_apps()
+            self._known_apps_cache = known_apps
+        app = known_apps.get(browser_id)
         if app:
             return app.title
         mapping = {
@@ -1794,17 +2019,19 @@ class IntentRouter:
 
     def _resolve_browser_choice(self, message: str, allowed: Optional[Iterable[str]] = None) -> Optional[str]:
         normalized = message.lower().strip()
-        candidates = list(allowed) if allowed is not None else list(self.browser_aliases.keys())
+        mentioned = {self._browser_by_alias[match.group(0)] for match in self._browser_alias_re.finditer(normalized)}
+        if not mentioned:
+            return None
+        candidates = allowed if allowed is not None else self.browser_aliases.keys()
         for browser_id in candidates:
-            aliases = self.browser_aliases.get(browser_id, ())
-            for alias in aliases:
-                if re.search(rf"\b{re.escape(alias.lower())}\b", normalized):
-                    return browser_id
+            if browser_id in mentioned:
+                return browser_id
         return None
 
-    def _launch_browser(self, browser_id: str, session: AgentSession) -> Dict[str, Any]:
+    def _launch_browser(self, browser_id: str, session: AgentSession, *, verified: bool = False) -> Dict[str, Any]:
         title = self._browser_title(browser_id)
-        if not apps_module.is_installed(browser_id):
+        if not verified and not self._is_installed(browser_id):
+            self._invalidate_app_caches()
             session.awaiting_browser_choice = False
             session.available_browsers = tuple()
             if session.preferred_browser == browser_id:
@@ -1819,6 +2046,8 @@ class IntentRouter:
             reply = f"Открываю {title}."
             return self._make_response(reply, ok=True, data={"result": result})
 
+        # браузер мог быть удалён после проверки — перепроверим в следующий раз
+        self._invalidate_app_caches()
         error_message = result.get("message") or result.get("error") or "Не удалось открыть браузер."
         return self._make_response(f"Не удалось открыть {title}: {error_message}", ok=False, data={"result": result})
 
@@ -1834,9 +2063,9 @@ class IntentRouter:
                 session.preferred_browser = initial_choice
 
         preferred = session.preferred_browser
-        if preferred and apps_module.is_installed(preferred):
-            return self._launch_browser(preferred, session)
-        if preferred and not apps_module.is_installed(preferred):
+        if preferred:
+            if self._is_installed(preferred):
+                return self._launch_browser(preferred, session, verified=True)
             session.preferred_browser = None
 
         available = self._available_browsers()
@@ -1846,7 +2075,7 @@ class IntentRouter:
             return self._make_response("Не удалось найти установленный браузер.", ok=False)
 
         if len(available) == 1:
-            return self._launch_browser(available[0], session)
+            return self._launch_browser(available[0], session, verified=True)
 
         session.awaiting_browser_choice = True
         session.available_browsers = tuple(available)
@@ -1854,14 +2083,30 @@ class IntentRouter:
         reply = f"Какой браузер открыть? Доступны: {options}"
         return self._make_response(reply, ok=False)
 
+    @staticmethod
+    def _flatten_keywords(keywords: Dict[str, tuple[str, ...]]) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        pairs = [(variant, key) for key, variants in keywords.items() for variant in variants]
+        return tuple(variant for variant, _ in pairs), tuple(key for _, key in pairs)
+
     def fuzzy_match(self, phrase: str, keywords: Dict[str, tuple[str, ...]]) -> Optional[str]:
         phrase_lower = phrase.lower()
+        if keywords is self.APP_KEYWORDS:
+            variants, owners = self._app_keyword_choices
+        else:
+            variants, owners = self._flatten_keywords(keywords)
+        if fuzz_process is not None:
+            match = fuzz_process.extractOne(
+                phrase_lower,
+                variants,
+                scorer=fuzz.partial_ratio,
+                score_cutoff=self.FUZZY_MATCH_CUTOFF,
+            )
+            return owners[match[2]] if match else None
         best_key: Optional[str] = None
         best_score = 0.0
-        for key, variants in keywords.items():
-            for variant in variants:
-                score = fuzz.partial_ratio(phrase_lower, variant)
-                if score > best_score:
-                    best_score = score
-                    best_key = key
-        return best_key if best_score >= 65 else None
+        for variant, key in zip(variants, owners):
+            score = fuzz.partial_ratio(phrase_lower, variant)
+            if score > best_score:
+                best_score = score
+                best_key = key
+        return best_key if best_score >= self.FUZZY_MATCH_CUTOFF else None
@@ -1,15 +1,31 @@
 """Точка входа для FastAPI сервера LocalWinAgent."""
 from __future__ import annotations
 
+import asyncio
+import atexit
 import json
 import logging
+import os
+import queue
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Dict
+from typing import Any, AsyncIterator, Optional, Union
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
+try:  # pragma: no cover - orjson может отсутствовать в окружении
+    import orjson  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover
+    orjson = None  # type: ignore
+try:  # pragma: no cover - msgspec может отсутствовать в окружении
+    import msgspec  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover
+    msgspec = None  # type: ignore
 try:  # pragma: no cover - rich может отсутствовать в тестовой среде
     from rich.logging import RichHandler  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover
@@ -18,21 +34,53 @@ except ModuleNotFoundError:  # pragma: no cover
 
 from intent_router import AgentSession, IntentRouter, SessionState
 
+# сколько символов потока можно склеить в один кадр WebSocket
+STREAM_BATCH_CHARS = 4096
+# сколько символов сообщения клиента попадает в лог
+LOG_PREVIEW_CHARS = 200
+# предельный размер входящего кадра; сообщения чата на порядки меньше
+MAX_FRAME_BYTES = 64 * 1024
+
 LOG_PATH = Path("logs/agent.log")
 LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-logging.basicConfig(
-    level="INFO",
-    format="%(message)s",
-    handlers=[
-        RichHandler(rich_tracebacks=True, markup=True),
-        logging.FileHandler(LOG_PATH, encoding="utf-8"),
-    ],
-)
+
+
+class _LocalQueueHandler(QueueHandler):
+    """Очередь живёт в этом же процессе, поэтому exc_info сохраняем для RichHandler."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+# вывод в консоль и в файл выполняется в фоновом потоке, event loop только кладёт запись в очередь
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_rich_handler = RichHandler(rich_tracebacks=True, markup=True)
+_file_handler = logging.FileHandler(LOG_PATH, encoding="utf-8")
+for _handler in (_rich_handler, _file_handler):
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+_log_listener = QueueListener(_log_queue, _rich_handler, _file_handler, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+logging.basicConfig(level="INFO", handlers=[_LocalQueueHandler(_log_queue)])
 
 logger = logging.getLogger("localwinagent")
 
-app = FastAPI(title="LocalWinAgent", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # индекс приложений и список браузеров читаются с диска, поэтому собираем их до первого клиента
+    try:
+        await asyncio.to_thread(intent_router.warm_up)
+    except Exception as exc:  # pragma: no cover - прогрев не должен мешать запуску
+        logger.warning("Не удалось прогреть маршрутизатор: %s", exc)
+    yield
+
+
+app = FastAPI(title="LocalWinAgent", version="1.0.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -47,32 +95,163 @@ app.mount("/static", StaticFiles(directory=frontend_dir), name="static")
 intent_router = IntentRouter()
 
 
-class ConnectionManager:
-    def __init__(self) -> None:
-        self.sessions: Dict[int, AgentSession] = {}
-        self.session_states: Dict[int, dict] = {}
+def _loads(payload: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def _dumps(data: Any) -> str:
+    # кадры остаются текстовыми: клиент разбирает event.data через JSON.parse
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+async def _coalesce_stream(chunks: AsyncIterator[str], limit: int = STREAM_BATCH_CHARS) -> AsyncIterator[str]:
+    """Склеить части потока, накопившиеся пока отправлялся предыдущий кадр."""
+
+    pending: asyncio.Queue[Any] = asyncio.Queue()
+    finished = object()
+
+    async def _pump() -> None:
+        try:
+            async for chunk in chunks:
+                if chunk:
+                    pending.put_nowait(chunk)
+        except Exception as exc:  # ошибку генерации передаём потребителю
+            pending.put_nowait(exc)
+        finally:
+            pending.put_nowait(finished)
+
+    pump = asyncio.create_task(_pump())
+    try:
+        done = False
+        while not done:
+            item = await pending.get()
+            batch: list[str] = []
+            size = 0
+            while True:
+                if item is finished:
+                    done = True
+                    break
+                if isinstance(item, Exception):
+                    if batch:
+                        yield "".join(batch)
+                    raise item
+                batch.append(item)
+                size += len(item)
+                if size >= limit or pending.empty():
+                    break
+                item = pending.get_nowait()
+            if batch:
+                yield "".join(batch)
+    finally:
+        pump.cancel()
+
+
+# признак отсутствующего флага во входящем кадре; null, как и раньше, означает False
+UNSET: Any = msgspec.UNSET if msgspec is not None else object()
+
+# строковые и числовые флаги, которые декодер msgspec принимает при strict=False
+_LAX_BOOLS = {"true": True, "1": True, "false": False, "0": False}
+
 
-    async def connect(self, websocket: WebSocket) -> None:
-        await websocket.accept()
-        self.sessions[id(websocket)] = AgentSession()
-        self.session_states[id(websocket)] = {"session_state": SessionState()}
-        logger.info("Новое подключение WebSocket: %s", id(websocket))
+@dataclass(slots=True)
+class _PlainFrame:
+    """Кадр от клиента без msgspec; лишние поля (например, confirm) пропускаются."""
 
-    def disconnect(self, websocket: WebSocket) -> None:
-        session = self.sessions.pop(id(websocket), None)
-        self.session_states.pop(id(websocket), None)
-        logger.info("Отключение WebSocket %s", id(websocket))
-        if session and session.pending:
-            logger.debug("Сброс ожидающего действия для %s", id(websocket))
+    message: str = ""
+    auto_confirm: Any = UNSET
+    force_confirm: Any = UNSET
+    model: Optional[str] = None
 
-    def get_session(self, websocket: WebSocket) -> AgentSession:
-        return self.sessions[id(websocket)]
 
-    def get_state(self, websocket: WebSocket) -> dict:
-        return self.session_states[id(websocket)]
+def _lax_bool(value: Any, field: str) -> Optional[bool]:
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.lower()
+        if lowered in _LAX_BOOLS:
+            return _LAX_BOOLS[lowered]
+        if lowered == "null":
+            return None
+    raise ValueError(f"Expected `bool | null` - at `$.{field}`")
 
 
-manager = ConnectionManager()
+def _decode_plain_frame(payload: str) -> _PlainFrame:
+    """Разобрать кадр стандартными средствами с теми же проверками, что и у msgspec."""
+
+    data = _loads(payload)
+    if not isinstance(data, dict):
+        raise ValueError("Expected `object`")
+    message = data.get("message", "")
+    if not isinstance(message, str):
+        raise ValueError("Expected `str` - at `$.message`")
+    model = data.get("model")
+    if model is not None and not isinstance(model, str):
+        raise ValueError("Expected `str | null` - at `$.model`")
+    return _PlainFrame(
+        message=message,
+        auto_confirm=_lax_bool(data["auto_confirm"], "auto_confirm") if "auto_confirm" in data else UNSET,
+        force_confirm=_lax_bool(data["force_confirm"], "force_confirm") if "force_confirm" in data else UNSET,
+        model=model,
+    )
+
+
+if msgspec is not None:
+
+    class InboundFrame(msgspec.Struct):
+        """Кадр от клиента; лишние поля (например, confirm) декодер пропускает."""
+
+        message: str = ""
+        auto_confirm: Union[bool, None, msgspec.UnsetType] = msgspec.UNSET
+        force_confirm: Union[bool, None, msgspec.UnsetType] = msgspec.UNSET
+        model: Optional[str] = None
+
+    # strict=False принимает и строковые "true"/"false" от сторонних клиентов
+    _FRAME_DECODER = msgspec.json.Decoder(InboundFrame, strict=False)
+
+    def _decode_frame(payload: str) -> InboundFrame:
+        try:
+            return _FRAME_DECODER.decode(payload)
+        except msgspec.DecodeError as exc:  # ValidationError наследуется от DecodeError
+            raise ValueError(str(exc)) from exc
+
+else:  # pragma: no cover - запасной путь без msgspec
+    InboundFrame = _PlainFrame  # type: ignore[misc]
+    _decode_frame = _decode_plain_frame
+
+
+def _preview(text: str, limit: int = LOG_PREVIEW_CHARS) -> str:
+    """Обрезать текст для лога, чтобы большой кадр не форматировался целиком."""
+
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}… (ещё {len(text) - limit} симв.)"
+
+
+@lru_cache(maxsize=16)
+def _done_frame(model: str) -> str:
+    """Завершающий кадр потока; сериализуется один раз для каждой модели."""
+
+    return _dumps({"done": True, "model": model})
+
+
+@lru_cache(maxsize=16)
+def _bad_json_frame(model: str) -> str:
+    """Ответ на некорректный JSON; меняется только вместе с моделью сессии."""
+
+    return _dumps(
+        {
+            "response": "Ошибка: некорректный формат сообщения",
+            "requires_confirmation": False,
+            "ok": False,
+            "model": model,
+        }
+    )
 
 
 @app.get("/health")
@@ -80,73 +259,87 @@ def healthcheck() -> JSONResponse:
     return JSONResponse({"status": "ok"})
 
 
+CHAT_INDEX = frontend_dir / "chat" / "index.html"
+
+
+@lru_cache(maxsize=1)
+def _chat_html() -> bytes:
+    return CHAT_INDEX.read_bytes()
+
+
 @app.get("/chat")
-async def chat_page() -> FileResponse:
-    return FileResponse(frontend_dir / "chat" / "index.html")
+async def chat_page() -> Response:
+    # LOCALWINAGENT_DEV=1 перечитывает страницу на каждый запрос, чтобы правки были видны сразу
+    content = CHAT_INDEX.read_bytes() if os.environ.get("LOCALWINAGENT_DEV") == "1" else _chat_html()
+    return Response(content, media_type="text/html; charset=utf-8")
 
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket) -> None:
-    await manager.connect(websocket)
-    session = manager.get_session(websocket)
-    state = manager.get_state(websocket)
+    await websocket.accept()
+    # сессия живёт только в этом обработчике и освобождается вместе с соединением
+    session = AgentSession()
+    # handle_message принимает SessionState напрямую, обёртка-словарь на соединение не нужна
+    state = SessionState()
+    logger.info("Новое подключение WebSocket: %s", id(websocket))
     try:
         while True:
             payload = await websocket.receive_text()
+            # символ UTF-8 занимает до 4 байт: короткие кадры пропускаем без кодирования,
+            # а длинные меряем в байтах, иначе кириллица проходила бы вдвое больше лимита
+            if len(payload) > MAX_FRAME_BYTES // 4 and len(payload.encode("utf-8")) > MAX_FRAME_BYTES:
+                logger.warning("Слишком большой кадр от клиента: %d симв.", len(payload))
+                await websocket.close(code=1009, reason="Слишком большое сообщение")
+                return
             try:
-                data = json.loads(payload)
-            except json.JSONDecodeError:
-                logger.warning("Некорректный JSON от клиента: %s", payload)
-                await websocket.send_json(
-                    {
-                        "response": "Ошибка: некорректный формат сообщения",
-                        "requires_confirmation": False,
-                        "ok": False,
-                        "model": session.model,
-                    }
-                )
+                frame = _decode_frame(payload)
+            except ValueError:  # JSONDecodeError (и orjson, и json) наследуется от ValueError
+                if logger.isEnabledFor(logging.WARNING):
+                    logger.warning("Некорректный JSON от клиента: %r", _preview(payload, 128))
+                await websocket.send_text(_bad_json_frame(session.model))
                 continue
 
-            message = str(data.get("message", ""))
-            auto_present = "auto_confirm" in data
-            force_present = "force_confirm" in data
-            auto_value = bool(data.get("auto_confirm", False))
-            force_value = bool(data.get("force_confirm", False))
-            model = data.get("model")
-
-            if auto_present:
-                session.auto_confirm = auto_value
-            if isinstance(model, str) and model:
-                session.model = model
+            message = frame.message
+            auto_confirm = None if frame.auto_confirm is UNSET else bool(frame.auto_confirm)
+            force_confirm = None if frame.force_confirm is UNSET else bool(frame.force_confirm)
+            if auto_confirm is not None:
+                session.auto_confirm = auto_confirm
+            if frame.model:
+                session.model = frame.model
 
-            logger.info("Сообщение от клиента: %s", message)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Сообщение от клиента: %s", _preview(message))
             session.streaming_enabled = True
-            response = intent_router.handle_message(
+            # маршрутизатор синхронный и может ждать LLM, песочницу или диск — уводим его из event loop,
+            # чтобы медленный запрос одного клиента не задерживал кадры остальных
+            response = await asyncio.to_thread(
+                intent_router.handle_message,
                 message,
                 session,
                 state,
-                auto_confirm=auto_value if auto_present else None,
-                force_confirm=force_value if force_present else None,
+                auto_confirm=auto_confirm,
+                force_confirm=force_confirm,
             )
             streaming_requested = session.streaming_enabled
             session.streaming_enabled = False
-            data_field = response.get("data")
-            prompt_value = ""
-            if isinstance(data_field, dict):
-                prompt_value = str(data_field.get("prompt") or "")
-            should_stream = streaming_requested and response.get("intent") == "qa" and prompt_value
-            if should_stream:
-                prompt = prompt_value
-                model_name = session.model or intent_router.llm.default_model
+            # handle_message возвращает dict (на нём завязаны тесты), поэтому каждое поле читаем ровно один раз
+            intent = response.get("intent")
+            prompt = ""
+            if streaming_requested and intent == "qa":
+                data_field = response.get("data")
+                if isinstance(data_field, dict):
+                    prompt = str(data_field.get("prompt") or "")
+            if prompt:
+                model_name = session.model or intent_router.default_model
                 try:
-                    async for chunk in intent_router.llm.stream_generate(model_name, prompt):
-                        if chunk:
-                            await websocket.send_text(chunk)
+                    stream = intent_router.llm.stream_generate(model_name, prompt)
+                    async for chunk in _coalesce_stream(stream):
+                        await websocket.send_text(chunk)
                 except Exception as exc:  # pragma: no cover - защита от неожиданных ошибок
                     logger.exception("Ошибка потоковой генерации: %s", exc)
                     await websocket.send_text(f"Ошибка генерации: {exc}")
                 finally:
-                    await websocket.send_text(json.dumps({"done": True, "model": session.model}))
+                    await websocket.send_text(_done_frame(session.model))
                 continue
             payload = {
                 "response": response["reply"],
@@ -157,18 +350,26 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
             if "items" in response:
                 payload["items"] = response["items"]
             if "intent" in response:
-                payload["intent"] = response["intent"]
-            await websocket.send_json(payload)
+                payload["intent"] = intent
+            await websocket.send_text(_dumps(payload))
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
-        logger.info("WebSocket %s отключен", id(websocket))
+        pass
     except Exception as exc:  # pragma: no cover - защита от неожиданных ошибок
         logger.exception("Ошибка в WebSocket: %s", exc)
         await websocket.close(code=1011, reason=str(exc))
-        manager.disconnect(websocket)
+    finally:
+        logger.info("WebSocket %s отключен", id(websocket))
 
 
 if __name__ == "__main__":  # pragma: no cover
     import uvicorn
 
-    uvicorn.run("main:app", host="127.0.0.1", port=8765, reload=False)
+    # uvloop и httptools uvicorn выбирает сам; те же ws-настройки передаёт команда запуска из README
+    uvicorn.run(
+        "main:app",
+        host="127.0.0.1",
+        port=8765,
+        reload=False,
+        ws="websockets",
+        ws_max_size=MAX_FRAME_BYTES,
+    )
@@ -10,7 +10,7 @@ Set-Location $projectRoot
 Write-Host "Запуск LocalWinAgent..." -ForegroundColor Cyan
 
 $python = "python"
-$arguments = @("-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", "8765")
+$arguments = @("-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", "8765", "--ws", "websockets", "--ws-max-size", "65536")
 
 $process = Start-Process -FilePath $python -ArgumentList $arguments -WorkingDirectory $projectRoot -PassThru -WindowStyle Hidden
 Start-Sleep -Seconds 3
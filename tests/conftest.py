@@ -1,6 +1,89 @@
 import os
+import platform
+import shutil
 import sys
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pytest
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+
+def _fake_load_config(allowed: Path) -> Callable[[str], dict]:
+    """Подмена config.load_config с разрешённой директорией allowed."""
+
+    # как и config.load_config, отдаём один и тот же словарь на каждое имя
+    configs = {
+        "paths": {"whitelist": [str(allowed)], "default_downloads": str(allowed)},
+        "apps": {"apps": {}},
+        "web": {"browser": "chromium", "headless": True, "implicit_wait_ms": 1000},
+    }
+
+    def fake_load_config(name: str) -> dict:
+        return configs[name]
+
+    return fake_load_config
+
+
+def _clear_dir(path: Path) -> None:
+    """Удалить всё содержимое каталога, оставив сам каталог."""
+
+    for entry in path.iterdir():
+        if entry.is_dir() and not entry.is_symlink():
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            entry.unlink(missing_ok=True)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _fresh_config_cache() -> None:
+    """Сбросить кеш конфигов один раз: дальше фикстуры подменяют load_config целиком."""
+
+    import config
+
+    config.refresh_cache()
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _stub_shell_open():
+    """Тесты не открывают файлы и программы через системную оболочку."""
+
+    with pytest.MonkeyPatch.context() as patch:
+        if platform.system() != "Windows":
+            from tools import apps as apps_module
+            from tools import files as files_module
+
+            patch.setattr(apps_module, "open_with_shell", lambda p: p)
+            patch.setattr(files_module, "open_with_shell", lambda p: p)
+        else:
+            patch.setattr(os, "startfile", lambda p: p, raising=False)
+        yield
+
+
+@pytest.fixture(scope="session")
+def session_allow(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("allow")
+
+
+@pytest.fixture()
+def allow_dir(session_allow: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    """Разрешённая директория и подменённые конфиги для сборки IntentRouter.
+
+    Каталог общий на сессию; после каждого теста из него удаляется всё созданное.
+    """
+
+    import config
+
+    allowed = session_allow
+    fake_load_config = _fake_load_config(allowed)
+
+    monkeypatch.setenv("LOCALWINAGENT_INLINE_SANDBOX", "1")
+    monkeypatch.setattr(config, "load_config", fake_load_config)
+    monkeypatch.setattr("intent_router.load_config", fake_load_config)
+    try:
+        yield allowed
+    finally:
+        _clear_dir(allowed)
@@ -138,6 +138,15 @@ def test_launch_prefers_shortcut(monkeypatch: pytest.MonkeyPatch) -> None:
     assert popen_calls == []
 
 
+def test_best_candidate_exact_match_only() -> None:
+    entry = apps_module.best_candidate("Блокнот")
+    assert entry is not None
+    assert entry.is_manual is True
+    assert entry.key == "notepad"
+    assert entry.score == 100.0 + entry.score_boost
+    assert apps_module.best_candidate("блокн") is None
+
+
 def test_launch_executes_exe(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     exe_path = tmp_path / "Editor.exe"
     exe_path.write_text("run")
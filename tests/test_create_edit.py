@@ -5,31 +5,12 @@ from pathlib import Path
 import os
 
 import pytest
-from docx import Document
 
-import config
 from intent_router import AgentSession, IntentRouter, SessionState
 
 
 @pytest.fixture()
-def router_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
-    allow_dir = tmp_path / "allow"
-    allow_dir.mkdir()
-
-    def fake_load_config(name: str) -> dict:
-        if name == "paths":
-            return {"whitelist": [str(allow_dir)], "default_downloads": str(allow_dir)}
-        if name == "apps":
-            return {"apps": {}}
-        if name == "web":
-            return {"browser": "chromium", "headless": True, "implicit_wait_ms": 1000}
-        raise KeyError(name)
-
-    config.refresh_cache()
-    monkeypatch.setenv("LOCALWINAGENT_INLINE_SANDBOX", "1")
-    monkeypatch.setattr(config, "load_config", fake_load_config)
-    monkeypatch.setattr("intent_router.load_config", fake_load_config)
-
+def router_env(allow_dir: Path, monkeypatch: pytest.MonkeyPatch):
     router = IntentRouter()
     session = AgentSession()
     state = SessionState()
@@ -41,6 +22,9 @@ def router_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
 
 
 def _read_docx_text(path: Path) -> str:
+    # python-docx тянет lxml, поэтому импортируем его только в тесте, который читает .docx
+    from docx import Document
+
     document = Document(path)
     return "\n".join(paragraph.text for paragraph in document.paragraphs)
 
@@ -104,3 +88,11 @@ def test_confirmation_required_outside(router_env, tmp_path: Path) -> None:
     assert info["verified"] is False
     assert info["path"] == str(outside)
     assert not outside.exists()
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [('"', ""), ("'", ""), ("«", "«"), ('"отчет.txt"', "отчет.txt"), ("«план»", "план"), ("'''", "'")],
+)
+def test_router_strip_quotes(raw: str, expected: str) -> None:
+    assert IntentRouter._strip_quotes(raw) == expected
@@ -1,47 +1,17 @@
 from __future__ import annotations
 
-import os
-import platform
 from pathlib import Path
 from typing import List
 
 import pytest
 
-import config
 from intent_router import AgentSession, IntentRouter, SessionState
 
 
 @pytest.fixture()
-def dialog_router(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> IntentRouter:
-    allow_dir = tmp_path / "allow"
-    allow_dir.mkdir()
-
-    def fake_load_config(name: str) -> dict:
-        if name == "paths":
-            return {"whitelist": [str(allow_dir)], "default_downloads": str(allow_dir)}
-        if name == "apps":
-            return {"apps": {}}
-        if name == "web":
-            return {"browser": "chromium", "headless": True, "implicit_wait_ms": 1000}
-        raise KeyError(name)
-
-    config.refresh_cache()
-    monkeypatch.setenv("LOCALWINAGENT_INLINE_SANDBOX", "1")
-    monkeypatch.setattr(config, "load_config", fake_load_config)
-    monkeypatch.setattr("intent_router.load_config", fake_load_config)
-
+def dialog_router(allow_dir: Path, monkeypatch: pytest.MonkeyPatch) -> IntentRouter:
     router = IntentRouter()
     monkeypatch.chdir(allow_dir)
-
-    if platform.system() != "Windows":
-        from tools import apps as apps_module
-        from tools import files as files_module
-
-        monkeypatch.setattr(apps_module, "open_with_shell", lambda p: p)
-        monkeypatch.setattr(files_module, "open_with_shell", lambda p: p)
-    else:
-        monkeypatch.setattr(os, "startfile", lambda p: p, raising=False)
-
     return router
 
 
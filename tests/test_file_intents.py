@@ -1,50 +1,48 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple
 
 import os
 import platform
 
 import pytest
 
-import config
 from intent_router import AgentSession, IntentRouter, SessionState
 from tools.files import FileManager
 
 
-@pytest.fixture()
-def router_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Tuple[IntentRouter, AgentSession, SessionState, Path]:
-    allow_dir = tmp_path / "allow"
-    allow_dir.mkdir()
-
-    def fake_load_config(name: str) -> dict:
-        if name == "paths":
-            return {"whitelist": [str(allow_dir)], "default_downloads": str(allow_dir)}
-        if name == "apps":
-            return {"apps": {}}
-        if name == "web":
-            return {"browser": "chromium", "headless": True, "implicit_wait_ms": 1000}
-        raise KeyError(name)
-
-    config.refresh_cache()
-    monkeypatch.setenv("LOCALWINAGENT_INLINE_SANDBOX", "1")
-    monkeypatch.setattr(config, "load_config", fake_load_config)
-    monkeypatch.setattr("intent_router.load_config", fake_load_config)
-
-    router = IntentRouter()
-    session = AgentSession()
-    state = SessionState()
+@dataclass(slots=True)
+class RouterEnv:
+    router: IntentRouter
+    session: AgentSession
+    state: SessionState
+    allow_dir: Path
+    demo_txt: str
+    first_txt: str
+    second_txt: str
+
 
+@pytest.fixture()
+def router_env(allow_dir: Path, monkeypatch: pytest.MonkeyPatch) -> RouterEnv:
     if platform.system() != "Windows":
         monkeypatch.setattr(os, "startfile", lambda *_args, **_kwargs: None, raising=False)
 
-    return router, session, state, allow_dir
+    resolved = allow_dir.resolve(strict=False)
+    return RouterEnv(
+        router=IntentRouter(),
+        session=AgentSession(),
+        state=SessionState(),
+        allow_dir=allow_dir,
+        demo_txt=str(resolved / "demo.txt"),
+        first_txt=str(resolved / "first.txt"),
+        second_txt=str(resolved / "second.txt"),
+    )
 
 
-def test_search_file_lists_without_open(router_env, monkeypatch: pytest.MonkeyPatch) -> None:
-    router, session, state, allow_dir = router_env
-    demo_path = str((allow_dir / "demo.txt").resolve(strict=False))
+def test_search_file_lists_without_open(router_env: RouterEnv, monkeypatch: pytest.MonkeyPatch) -> None:
+    router, session, state = router_env.router, router_env.session, router_env.state
+    demo_path = router_env.demo_txt
 
     search_called = {"count": 0}
     open_called = {"count": 0}
@@ -69,9 +67,9 @@ def test_search_file_lists_without_open(router_env, monkeypatch: pytest.MonkeyPa
     assert state.get_results(kind="file") == [demo_path]
 
 
-def test_open_file_uses_path(router_env, monkeypatch: pytest.MonkeyPatch) -> None:
-    router, session, state, allow_dir = router_env
-    target = str((allow_dir / "demo.txt").resolve(strict=False))
+def test_open_file_uses_path(router_env: RouterEnv, monkeypatch: pytest.MonkeyPatch) -> None:
+    router, session, state = router_env.router, router_env.session, router_env.state
+    target = router_env.demo_txt
 
     def fake_open(self: FileManager, path: str) -> dict:
         assert path == target
@@ -85,10 +83,9 @@ def test_open_file_uses_path(router_env, monkeypatch: pytest.MonkeyPatch) -> Non
     assert response.get("requires_confirmation") is False
 
 
-def test_open_file_uses_last_result_pronoun(router_env, monkeypatch: pytest.MonkeyPatch) -> None:
-    router, session, state, allow_dir = router_env
-    first = str((allow_dir / "first.txt").resolve(strict=False))
-    second = str((allow_dir / "second.txt").resolve(strict=False))
+def test_open_file_uses_last_result_pronoun(router_env: RouterEnv, monkeypatch: pytest.MonkeyPatch) -> None:
+    router, session, state = router_env.router, router_env.session, router_env.state
+    first, second = router_env.first_txt, router_env.second_txt
 
     monkeypatch.setattr(
         "tools.search.search_files",
@@ -111,10 +108,9 @@ def test_open_file_uses_last_result_pronoun(router_env, monkeypatch: pytest.Monk
     assert response["reply"] == f"Открыл: {first}"
 
 
-def test_open_file_by_index(router_env, monkeypatch: pytest.MonkeyPatch) -> None:
-    router, session, state, allow_dir = router_env
-    first = str((allow_dir / "first.txt").resolve(strict=False))
-    second = str((allow_dir / "second.txt").resolve(strict=False))
+def test_open_file_by_index(router_env: RouterEnv, monkeypatch: pytest.MonkeyPatch) -> None:
+    router, session, state = router_env.router, router_env.session, router_env.state
+    first, second = router_env.first_txt, router_env.second_txt
 
     monkeypatch.setattr(
         "tools.search.search_files",
@@ -137,9 +133,9 @@ def test_open_file_by_index(router_env, monkeypatch: pytest.MonkeyPatch) -> None
     assert response["reply"] == f"Открыл: {second}"
 
 
-def test_open_file_error(router_env, monkeypatch: pytest.MonkeyPatch) -> None:
-    router, session, state, allow_dir = router_env
-    target = str((allow_dir / "missing.txt").resolve(strict=False))
+def test_open_file_error(router_env: RouterEnv, monkeypatch: pytest.MonkeyPatch) -> None:
+    router, session, state = router_env.router, router_env.session, router_env.state
+    target = str((router_env.allow_dir / "missing.txt").resolve(strict=False))
 
     def fake_open(self: FileManager, path: str) -> dict:
         return {"ok": False, "path": path, "error": "Ошибка открытия"}
@@ -4,34 +4,18 @@ from __future__ import annotations
 import os
 import os
 import platform
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Tuple
 
 import pytest
 
-import config
 from intent_router import AgentSession, IntentRouter, SessionState
 
 
 @pytest.fixture()
-def intent_router(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Tuple[IntentRouter, AgentSession, SessionState]:
-    allow_dir = tmp_path / "allow"
-    allow_dir.mkdir()
-
-    def fake_load_config(name: str) -> dict:
-        if name == "paths":
-            return {"whitelist": [str(allow_dir)], "default_downloads": str(allow_dir)}
-        if name == "apps":
-            return {"apps": {}}
-        if name == "web":
-            return {"browser": "chromium", "headless": True, "implicit_wait_ms": 1000}
-        raise KeyError(name)
-
-    config.refresh_cache()
-    monkeypatch.setenv("LOCALWINAGENT_INLINE_SANDBOX", "1")
-    monkeypatch.setattr(config, "load_config", fake_load_config)
-    monkeypatch.setattr("intent_router.load_config", fake_load_config)
-
+def intent_router(allow_dir: Path, monkeypatch: pytest.MonkeyPatch) -> Tuple[IntentRouter, AgentSession, SessionState]:
     router = IntentRouter()
     session = AgentSession()
     state = SessionState()
@@ -125,10 +109,9 @@ def test_infer_open_web(
 def test_context_pronoun_after_search(
     intent_router: Tuple[IntentRouter, AgentSession, SessionState],
     monkeypatch: pytest.MonkeyPatch,
-    tmp_path: Path,
+    allow_dir: Path,
 ) -> None:
     router, session, state = intent_router
-    allow_dir = tmp_path / "allow"
     found = [str((allow_dir / "report.pdf").resolve(strict=False))]
     monkeypatch.setattr("tools.search.search_files", lambda *args, **kwargs: found)
     monkeypatch.setattr("tools.search.search_local", lambda *args, **kwargs: found)
@@ -146,8 +129,8 @@ def test_context_pronoun_after_search(
     router.handle_message("открой его", session, state)
     router.handle_message("открой его", session, state)
     resolved = [str(Path(path).resolve(strict=False)) for path in opened]
-    expected = [str(Path(found[0]).resolve(strict=False))] * 2
-    assert resolved == expected
+    # found уже содержит разрешённый путь, повторный resolve не нужен
+    assert resolved == found * 2
 
 
 def test_reset_context(
@@ -168,3 +151,55 @@ def test_reset_context(
     assert response["ok"] is True
     assert state.last_kind == "none"
     assert state.get_results() == []
+
+
+def test_handle_message_from_threads(
+    intent_router: Tuple[IntentRouter, AgentSession, SessionState],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    router, _session, _state = intent_router
+    monkeypatch.setattr("tools.apps.launch", lambda key: {"ok": True, "message": "Готово"})
+    monkeypatch.setattr("tools.web.search_web", lambda query, max_results=5: [])
+    # маленький кеш, чтобы потоки постоянно сбрасывали его друг у друга
+    monkeypatch.setattr(router.intent_inferencer, "INFER_CACHE_SIZE", 2)
+    messages = ["открой браузер", "запусти калькулятор", "открой блокнот", "сбрось контекст"]
+
+    def worker(index: int) -> List[str]:
+        session, state = AgentSession(), SessionState()
+        replies = []
+        for step in range(100):
+            router._invalidate_app_caches()
+            message = messages[(index + step) % len(messages)]
+            replies.append(router.handle_message(message, session, state)["reply"])
+        return replies
+
+    # частое переключение потоков, чтобы гонки между чтением и записью кешей проявлялись
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            replies = [reply for chunk in pool.map(worker, range(8)) for reply in chunk]
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert not [reply for reply in replies if reply.startswith("Ошибка")]
+
+
+def test_context_index_requires_ordinal(
+    intent_router: Tuple[IntentRouter, AgentSession, SessionState],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    router, _session, state = intent_router
+    state.set_results(["first.txt", "last.txt"], "file")
+    opened: List[str] = []
+    monkeypatch.setattr(
+        router.file_manager,
+        "open_path",
+        lambda path: opened.append(path) or {"ok": True, "path": path, "reply": f"Открыто: {path}"},
+    )
+
+    # слово на «послед…», но не порядковое: это имя, а не ссылка на последний результат
+    router._handle_open_file({"path": "последствия"}, state)
+    router._handle_open_file({"path": "последний"}, state)
+
+    assert opened == ["последствия", "last.txt"]
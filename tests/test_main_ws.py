@@ -0,0 +1,63 @@
+"""Проверка WebSocket-обработчика сервера."""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+
+
+def test_oversized_cyrillic_frame_closed() -> None:
+    # 40 тысяч кириллических символов — меньше лимита в символах, но больше 64 КиБ в UTF-8
+    payload = '{"message": "%s"}' % ("я" * 40_000)
+    assert len(payload) < main.MAX_FRAME_BYTES < len(payload.encode("utf-8"))
+
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_text(payload)
+        with pytest.raises(WebSocketDisconnect) as excinfo:
+            websocket.receive_text()
+    assert excinfo.value.code == 1009
+
+
+FRAMES = [
+    "{}",
+    '{"message": "привет", "model": "llama3"}',
+    '{"message": 5}',
+    '{"message": null}',
+    '{"model": 5}',
+    '{"model": null}',
+    '{"auto_confirm": true, "force_confirm": false}',
+    '{"auto_confirm": "false", "force_confirm": "TRUE"}',
+    '{"auto_confirm": "1", "force_confirm": 0}',
+    '{"auto_confirm": null, "force_confirm": "null"}',
+    '{"auto_confirm": "yes"}',
+    '{"auto_confirm": 2}',
+    '{"auto_confirm": 1.0}',
+    '{"message": "да", "confirm": true}',
+    "[1, 2]",
+    '"text"',
+]
+
+
+def _decoded(decode: Any, payload: str) -> Dict[str, Any] | str:
+    try:
+        frame = decode(payload)
+    except ValueError:
+        return "error"
+    return {field: getattr(frame, field) for field in ("message", "auto_confirm", "force_confirm", "model")}
+
+
+@pytest.mark.parametrize("payload", FRAMES)
+def test_frame_decoders_agree(payload: str) -> None:
+    pytest.importorskip("msgspec")
+    assert _decoded(main._decode_frame, payload) == _decoded(main._decode_plain_frame, payload)
+
+
+def test_null_flag_means_false() -> None:
+    frame = main._decode_plain_frame('{"auto_confirm": null}')
+    assert frame.auto_confirm is not main.UNSET and not frame.auto_confirm
+    assert main._decode_plain_frame("{}").auto_confirm is main.UNSET
@@ -2,75 +2,75 @@
 from __future__ import annotations
 
 import os
-import platform
+import zipfile
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterator, Tuple
 
 import pytest
 
 import config
+from conftest import _clear_dir, _fake_load_config
 from intent_router import AgentSession, IntentRouter, SessionState
-from docx import Document
 
 
-@pytest.fixture()
-def router_with_tmp(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Dict[str, object]:
-    allow_dir = tmp_path / "allow"
+@pytest.fixture(scope="module")
+def shared_router(tmp_path_factory: pytest.TempPathFactory) -> Iterator[Tuple[IntentRouter, Path]]:
+    """Один маршрутизатор на модуль: конфиги читаются и разбираются однажды."""
+
+    allow_dir = tmp_path_factory.mktemp("router") / "allow"
     allow_dir.mkdir()
+    # каталог разрешаем один раз, тесты сравнивают ответы с готовой строкой
+    allow_dir = allow_dir.resolve()
 
-    def fake_load_config(name: str) -> Dict[str, object]:
-        if name == "paths":
-            return {
-                "whitelist": [str(allow_dir)],
-                "default_downloads": str(allow_dir),
-            }
-        if name == "apps":
-            return {"apps": {}}
-        if name == "web":
-            return {"browser": "chromium", "headless": True, "implicit_wait_ms": 1000}
-        raise KeyError(name)
-
-    config.refresh_cache()
-    monkeypatch.setenv("LOCALWINAGENT_INLINE_SANDBOX", "1")
-    monkeypatch.setattr(config, "load_config", fake_load_config)
-    monkeypatch.setattr("intent_router.load_config", fake_load_config)
+    fake_load_config = _fake_load_config(allow_dir)
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(config, "load_config", fake_load_config)
+        patch.setattr("intent_router.load_config", fake_load_config)
+        router = IntentRouter()
+        patch.setattr(router.llm, "generate", lambda prompt, model=None, stream=True: "Тестовый ответ")
+        yield router, allow_dir
 
-    router = IntentRouter()
-    monkeypatch.chdir(allow_dir)
 
-    if platform.system() != "Windows":
-        from tools import apps as apps_module
-        from tools import files as files_module
+@pytest.fixture()
+def frozen_time(monkeypatch: pytest.MonkeyPatch) -> int:
+    """Зафиксировать time.time во всём процессе, чтобы имена generated_<ts> были предсказуемы."""
 
-        monkeypatch.setattr(apps_module, "open_with_shell", lambda p: p)
-        monkeypatch.setattr(files_module, "open_with_shell", lambda p: p)
+    moment = 1_700_000_000
+    # маршрутизатор вызывает time.time() через общий модуль time, подменяем его
+    monkeypatch.setattr("time.time", lambda: moment)
+    return moment
 
-        def fake_open(path: str) -> dict:
-            return {
-                "ok": True,
-                "path": str(Path(path).resolve(strict=False)),
-                "reply": f"Открыто: {path}",
-            }
 
-        monkeypatch.setattr("tools.files.open_path", fake_open)
-    else:
-        monkeypatch.setattr(os, "startfile", lambda p: p, raising=False)
+@pytest.fixture()
+def router_with_tmp(shared_router: Tuple[IntentRouter, Path], monkeypatch: pytest.MonkeyPatch) -> Iterator[Dict[str, object]]:
+    """Общий маршрутизатор, который после каждого теста возвращается в исходное состояние."""
+
+    router, allow_dir = shared_router
+    monkeypatch.setenv("LOCALWINAGENT_INLINE_SANDBOX", "1")
+    monkeypatch.chdir(allow_dir)
+
+    def fake_open(path: str) -> dict:
+        return {
+            "ok": True,
+            "path": str(Path(path).resolve(strict=False)),
+            "reply": f"Открыто: {path}",
+        }
 
-        def fake_open_win(path: str) -> dict:
-            return {
-                "ok": True,
-                "path": str(Path(path).resolve(strict=False)),
-                "reply": f"Открыто: {path}",
-            }
+    monkeypatch.setattr("tools.files.open_path", fake_open)
 
-        monkeypatch.setattr("tools.files.open_path", fake_open_win)
+    yield {"router": router, "allow_dir": allow_dir, "resolved_allow": str(allow_dir), "monkeypatch": monkeypatch}
 
-    return {"router": router, "allow_dir": allow_dir, "monkeypatch": monkeypatch}
+    # файлы и кеши предыдущего теста не должны влиять на следующий
+    _clear_dir(allow_dir)
+    router.intent_inferencer._infer_cache.clear()
+    router._invalidate_app_caches()
 
 
 def test_full_file_flow(router_with_tmp: Dict[str, object]) -> None:
     router: IntentRouter = router_with_tmp["router"]  # type: ignore[assignment]
     allow_dir: Path = router_with_tmp["allow_dir"]  # type: ignore[assignment]
+    resolved_allow: str = router_with_tmp["resolved_allow"]  # type: ignore[assignment]
     session = AgentSession(auto_confirm=True)
     state = SessionState()
 
@@ -89,7 +89,7 @@ def test_full_file_flow(router_with_tmp: Dict[str, object]) -> None:
 
     response_open = router.handle_message("открой файл test.txt", session, state)
     assert response_open["reply"].startswith("Открыл: ")
-    assert str(full_path.resolve()) in response_open["reply"]
+    assert os.path.join(resolved_allow, "test.txt") in response_open["reply"]
 
     response_list = router.handle_message("покажи каталог .", session, state)
     assert "Каталог:" in response_list["reply"]
@@ -117,6 +117,7 @@ def test_router_desktop_listing(router_with_tmp: Dict[str, object]) -> None:
 def test_router_desktop_path(router_with_tmp: Dict[str, object]) -> None:
     router: IntentRouter = router_with_tmp["router"]  # type: ignore[assignment]
     allow_dir: Path = router_with_tmp["allow_dir"]  # type: ignore[assignment]
+    resolved_allow: str = router_with_tmp["resolved_allow"]  # type: ignore[assignment]
     monkeypatch: pytest.MonkeyPatch = router_with_tmp["monkeypatch"]  # type: ignore[assignment]
 
     monkeypatch.setattr("intent_router.get_desktop_path", lambda: allow_dir)
@@ -124,10 +125,10 @@ def test_router_desktop_path(router_with_tmp: Dict[str, object]) -> None:
     session = AgentSession(auto_confirm=True)
     state = SessionState()
     response = router.handle_message("напиши путь до рабочего стола", session, state)
-    assert str(allow_dir.resolve(strict=False)) in response["reply"]
+    assert resolved_allow in response["reply"]
 
 
-def test_generate_text_creates_file(router_with_tmp: Dict[str, object]) -> None:
+def test_generate_text_creates_file(router_with_tmp: Dict[str, object], frozen_time: int) -> None:
     router: IntentRouter = router_with_tmp["router"]  # type: ignore[assignment]
     allow_dir: Path = router_with_tmp["allow_dir"]  # type: ignore[assignment]
     monkeypatch: pytest.MonkeyPatch = router_with_tmp["monkeypatch"]  # type: ignore[assignment]
@@ -136,11 +137,10 @@ def test_generate_text_creates_file(router_with_tmp: Dict[str, object]) -> None:
     state = SessionState()
 
     monkeypatch.setattr(router.llm, "generate", lambda prompt, model=None, stream=True: "Текст о птицах.")
-    monkeypatch.setattr("intent_router.time.time", lambda: 1700000000)
 
     response = router.handle_message("создай текстовый файл и вставь в него текст о птицах", session, state)
     assert response["ok"] is True
-    expected_path = allow_dir / "generated_1700000000.txt"
+    expected_path = allow_dir / f"generated_{frozen_time}.txt"
     assert expected_path.exists()
     assert "птиц" in expected_path.read_text(encoding="utf-8").lower()
 
@@ -161,6 +161,7 @@ def test_generate_text_append_docx(router_with_tmp: Dict[str, object]) -> None:
     assert response["ok"] is True
     assert target.exists()
 
-    document = Document(str(target))
-    text = "\n".join(paragraph.text for paragraph in document.paragraphs)
-    assert "вороб" in text.lower()
+    # достаточно XML тела документа: полный разбор через python-docx здесь не нужен
+    with zipfile.ZipFile(target) as archive:
+        document_xml = archive.read("word/document.xml").decode("utf-8")
+    assert "вороб" in document_xml.lower()
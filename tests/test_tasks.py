@@ -1,39 +1,15 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Tuple
 
 import pytest
 
-import config
 from intent_router import AgentSession, IntentRouter, SessionState
 
 
-@pytest.fixture(autouse=True)
-def inline_sandbox(monkeypatch: pytest.MonkeyPatch) -> None:
-    monkeypatch.setenv("LOCALWINAGENT_INLINE_SANDBOX", "1")
-    yield
-    monkeypatch.delenv("LOCALWINAGENT_INLINE_SANDBOX", raising=False)
-
-
 @pytest.fixture()
-def router_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Tuple[IntentRouter, Path]:
-    allow_dir = tmp_path / "allow"
-    allow_dir.mkdir()
-
-    def fake_load_config(name: str) -> Dict[str, object]:
-        if name == "paths":
-            return {"whitelist": [str(allow_dir)], "default_downloads": str(allow_dir)}
-        if name == "apps":
-            return {"apps": {}}
-        if name == "web":
-            return {"browser": "chromium", "headless": True, "implicit_wait_ms": 1000}
-        raise KeyError(name)
-
-    config.refresh_cache()
-    monkeypatch.setattr(config, "load_config", fake_load_config)
-    monkeypatch.setattr("intent_router.load_config", fake_load_config)
-
+def router_env(allow_dir: Path, monkeypatch: pytest.MonkeyPatch) -> Tuple[IntentRouter, Path]:
     router = IntentRouter()
     monkeypatch.chdir(allow_dir)
     return router, allow_dir
@@ -80,9 +56,10 @@ def test_show_screenshot(router_env: Tuple[IntentRouter, Path], monkeypatch: pyt
 
     target = allow_dir / "screen.png"
     target.write_text("fake", encoding="utf-8")
+    resolved_target = str(target.resolve(strict=False))
 
     def fake_search(query: str, **kwargs) -> list[str]:
-        return [str(target.resolve(strict=False))]
+        return [resolved_target]
 
     opened: list[str] = []
 
@@ -97,14 +74,14 @@ def test_show_screenshot(router_env: Tuple[IntentRouter, Path], monkeypatch: pyt
     response = router.handle_message("покажи вчерашний скриншот", session, state)
 
     assert response["ok"] is True
-    assert response.get("items") == [str(target.resolve(strict=False))]
+    assert response.get("items") == [resolved_target]
     assert opened == []
-    assert state.get_results(kind="file") == [str(target.resolve(strict=False))]
+    assert state.get_results(kind="file") == [resolved_target]
 
     open_response = router.handle_message("открой первый", session, state)
 
     assert open_response["ok"] is True
-    assert opened == [str(target.resolve(strict=False))]
+    assert opened == [resolved_target]
 
 
 def test_search_web_and_open(router_env: Tuple[IntentRouter, Path], monkeypatch: pytest.MonkeyPatch) -> None:
@@ -159,7 +136,7 @@ def test_context_open_last_result(router_env: Tuple[IntentRouter, Path], monkeyp
 
     assert response["ok"] is True
     resolved = [str(Path(path).resolve(strict=False)) for path in opened]
-    assert resolved == [str(Path(absolute).resolve(strict=False))]
+    assert resolved == [absolute]
 
 
 def test_requires_confirmation(router_env: Tuple[IntentRouter, Path], tmp_path: Path) -> None:
@@ -255,6 +255,18 @@ class ApplicationsManager:
             return ranked[:limit]
         return ranked
 
+    def best_candidate(self, query: str) -> Optional[IndexedEntry]:
+        """Вернуть запись с точным совпадением ключа без нечёткого ранжирования."""
+
+        token = query.strip().lower()
+        if not token:
+            return None
+        entries = self.index_by_name.get(token)
+        if not entries:
+            return None
+        best = max(entries, key=lambda entry: (entry.is_manual, entry.score_boost))
+        return replace(best, score=100.0 + float(best.score_boost))
+
     def launch(self, query_or_id: str) -> Dict[str, object]:
         if not query_or_id:
             return {"ok": False, "error": "Не указано приложение."}
@@ -701,6 +713,10 @@ def candidates(query: str, limit: int = 10) -> List[IndexedEntry]:
     return _MANAGER.candidates(query, limit=limit)
 
 
+def best_candidate(query: str) -> Optional[IndexedEntry]:
+    return _MANAGER.best_candidate(query)
+
+
 def launch(name_or_alias: str) -> Dict[str, object]:
     return _MANAGER.launch(name_or_alias)
 
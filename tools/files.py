@@ -8,6 +8,7 @@ import platform
 import shutil
 import subprocess
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable, Optional
 from xml.sax.saxutils import escape
@@ -146,13 +147,19 @@ def normalize_path(
     return (base_path / candidate).resolve(strict=False)
 
 
-def get_desktop_path() -> Path:
-    desktop = config._KNOWN.get("DESKTOP")  # pylint: disable=protected-access
+@lru_cache(maxsize=4)
+def _resolve_desktop(desktop: Optional[str]) -> Path:
     if desktop:
         return Path(desktop).resolve(strict=False)
     return (Path.home() / "Desktop").resolve(strict=False)
 
 
+def get_desktop_path() -> Path:
+    """Вернуть абсолютный путь к рабочему столу (разрешается один раз на значение)."""
+
+    return _resolve_desktop(config._KNOWN.get("DESKTOP"))  # pylint: disable=protected-access
+
+
 def _get_file_attributes(path: Path) -> int:
     if platform.system() != "Windows":
         return 0
@@ -206,7 +213,8 @@ class FileManager:
     """Класс для безопасной работы с файлами в заданных директориях."""
 
     def __init__(self, whitelist: Iterable[str]):
-        self.whitelist = list(whitelist)
+        # кортеж из кортежа не копируется: роутер передаёт сюда неизменяемый снимок
+        self.whitelist = tuple(whitelist)
         self._allowed_paths = [normalize_path(item) for item in self.whitelist]
         self._default_root = (
             self._allowed_paths[0] if self._allowed_paths else get_desktop_path()
@@ -22,7 +22,8 @@ class OllamaClient:
 
     def _post(self, endpoint: str, payload: Dict[str, object], stream: bool) -> str:
         url = f"{self.base_url}{endpoint}"
-        data = json.dumps(payload).encode("utf-8")
+        # без ensure_ascii кириллица уходит в UTF-8, а не шестибайтовыми \uXXXX
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
         req = request.Request(url, data=data, method="POST")
         req.add_header("Content-Type", "application/json")
         try:
@@ -87,9 +88,12 @@ class OllamaClient:
             "stream": True,
         }
         url = f"{self.base_url}/api/generate"
+        # httpx при json= экранирует кириллицу, поэтому тело кодируем так же, как в _post
+        content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
         try:
             async with httpx.AsyncClient(timeout=None) as client:
-                async with client.stream("POST", url, json=payload) as response:
+                async with client.stream("POST", url, content=content, headers=headers) as response:
                     response.raise_for_status()
                     async for line in response.aiter_lines():
                         if not line: